@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter
+
+from text_processor import OUTPUT_WRITERS, FrequencyIndex, TextProcessor, top_k_words
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def best_time(function, repeat):
+    """ Run `function` `repeat` times and return (best wall time in seconds, last result) """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def method_chain(processor, text):
+    """ The original pipeline: three re.sub calls on raw pattern strings, split, list filter, Counter """
+    text = re.sub(r"https?://\S+|www\.\S+", "", text)
+    text = re.sub(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "", text)
+    text = re.sub(r"[^\w\s]", "", text)
+    words = text.split()
+    filtered_words = [word for word in words if word not in processor.stop_words]
+    return dict(Counter(filtered_words))
+
+def fused_tokenizer(processor, text):
+    """ The precompiled tokenizer feeding the Counter directly """
+    return dict(Counter(processor.tokenize(text)))
+
+def bench_tokenizer(text, repeat):
+    processor = TextProcessor(None, None)
+    chain_time, chain_result = best_time(lambda: method_chain(processor, text), repeat)
+    fused_time, fused_result = best_time(lambda: fused_tokenizer(processor, text), repeat)
+    assert chain_result == fused_result, "tokenizer output differs from the method chain"
+
+    print(f"{'method':<20}{'best (s)':>10}{'MB/s':>10}")
+    size_mb = len(text.encode("utf-8")) / 1e6
+    for name, seconds in (("method chain", chain_time), ("fused tokenizer", fused_time)):
+        print(f"{name:<20}{seconds:>10.4f}{size_mb / seconds:>10.1f}")
+    print(f"speedup: {chain_time / fused_time:.2f}x")
+
+def synthetic_vocabulary(size, seed=0):
+    """ `size` distinct Persian-looking words with Zipf-like counts """
+    rng = random.Random(seed)
+    letters = "ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(2, 10))))
+    return {word: max(1, int(100000 / rank)) for rank, word in enumerate(words, start=1)}
+
+def bench_writers(word_counts, repeat, top_k, lookups=1000):
+    """ Write time, file size and reload time of every output format, plus the top-K mode """
+    probe = random.Random(1).sample(list(word_counts), min(lookups, len(word_counts)))
+    print(f"{'format':<20}{'write (s)':>10}{'size (MB)':>11}{'vs json':>9}{'reload (s)':>12}")
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [(name, writer, word_counts) for name, writer in OUTPUT_WRITERS.items()]
+        cases.append((f"top-{top_k} json", OUTPUT_WRITERS["json"], None))
+        for name, writer, counts in cases:
+            path = os.path.join(tmp, name.replace(" ", "_"))
+            if counts is None:  # top-K selection is part of the write cost
+                write = lambda: writer(top_k_words(word_counts, top_k), path)
+            else:
+                write = lambda: writer(counts, path)
+            write_time, _ = best_time(write, repeat)
+
+            if name == "binary":
+                # reload = open the mmap and answer `lookups` point queries, no parsing
+                def reload():
+                    with FrequencyIndex(path) as index:
+                        return [index.get(word) for word in probe]
+            else:
+                def reload():
+                    with open(path, 'r', encoding='utf-8') as file:
+                        loaded = json.load(file)
+                    return [loaded.get(word) for word in probe]
+            reload_time, _ = best_time(reload, repeat)
+            sizes[name] = os.path.getsize(path)
+            print(f"{name:<20}{write_time:>10.4f}{sizes[name] / 1e6:>11.2f}{sizes[name] / sizes['json']:>9.0%}"
+                  f"{reload_time:>12.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for TextProcessor")
+    parser.add_argument("--input", default=os.path.join(HERE, "input.txt"))
+    parser.add_argument("--scale", type=int, default=1000, help="repeat the sample input this many times")
+    parser.add_argument("--repeat", type=int, default=5, help="keep the best of this many runs")
+    parser.add_argument("--vocab", type=int, default=200000, help="vocabulary size for the writer benchmark")
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--only", choices=["tokenizer", "writers"], help="run a single benchmark")
+    args = parser.parse_args()
+
+    if args.only != "writers":
+        with open(args.input, 'r', encoding='utf-8') as file:
+            text = file.read() * args.scale
+        print(f"input: {args.input} x{args.scale} ({len(text.encode('utf-8')) / 1e6:.1f} MB)")
+        bench_tokenizer(text, args.repeat)
+    if args.only != "tokenizer":
+        print(f"\nvocabulary: {args.vocab} words")
+        bench_writers(synthetic_vocabulary(args.vocab), args.repeat, args.top_k)
@@ -1,13 +1,268 @@
+import os
 import re
+import copy
 import json
+import mmap
+import heapq
+import struct
+import hashlib
+import sqlite3
 import string
+import argparse
 from collections import Counter 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, filterfalse
+from operator import itemgetter
+
+# Streaming mode reads the input in blocks of this many bytes
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# ASCII whitespace bytes never occur inside a multi-byte UTF-8 sequence,
+# so cutting a block right after one of them is always safe to decode
+WHITESPACE_BYTES = (b" ", b"\n", b"\t", b"\r", b"\x0b", b"\x0c")
+
+# Precompiled once, instead of re-parsing the pattern strings on every clean_text call
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")  # everything except characters, digits, whitespaces, underscore
+
+# How far to read at a time when looking for a whitespace to split the file at
+SPLIT_SCAN_SIZE = 4096
+
+# Binary frequency file: magic, entry count N, block size B, the offsets of every B-th entry and of the end,
+# then the entries sorted by word (UTF-8 bytes order), each the word's length and count as varints followed
+# by the word. Header and offsets are little-endian uint32, so a lookup bisects the blocks straight off an
+# mmap and scans at most B entries; the varints keep lengths and (mostly small) counts to a byte or two.
+BINARY_MAGIC = b"WFREQ002"
+BINARY_HEADER = struct.Struct("<8sII")
+BINARY_BLOCK_SIZE = 16
+UINT32 = struct.Struct("<I")
+
+def remove_urls_and_emails(text):
+    """ Remove URLs and emails, running each pattern only on the lines that can match it """
+    # A URL needs '://' or 'www.' and an email needs '@', and neither can span a line,
+    # so the (slow, per-position) regex scan is skipped for every other line.
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        if "://" in line or "www." in line:
+            line = URL_PATTERN.sub("", line)
+        if "@" in line:
+            line = EMAIL_PATTERN.sub("", line)
+        lines[i] = line
+    return "\n".join(lines)
+
+def write_json(word_counts, path):
+    """ Indented JSON, the original output format """
+    with open(path, 'w', encoding="utf-8") as file:
+        json.dump(word_counts, file, ensure_ascii=False, indent=4)
+
+def write_compact_json(word_counts, path):
+    """ JSON without indentation or spaces after separators """
+    with open(path, 'w', encoding="utf-8") as file:
+        json.dump(word_counts, file, ensure_ascii=False, separators=(",", ":"))
+
+def encode_varint(value):
+    """ Unsigned LEB128: 7 bits per byte, high bit set on every byte but the last """
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def decode_varint(buffer, position):
+    """ (value, position after it) of the varint at `position` """
+    value = shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+def write_binary(word_counts, path):
+    """ Sorted binary file, read back with FrequencyIndex """
+    words = sorted(word_counts)  # code point order is also UTF-8 byte order, which FrequencyIndex bisects on
+    entries = []
+    for word in words:
+        encoded = word.encode("utf-8")
+        entries.append(encode_varint(len(encoded)) + encode_varint(word_counts[word]) + encoded)
+    ends = list(accumulate(map(len, entries)))
+    offsets = [0] + ends[BINARY_BLOCK_SIZE - 1:-1:BINARY_BLOCK_SIZE] + ends[-1:]
+    if offsets[-1] > 0xFFFFFFFF:
+        raise ValueError("too many words for the binary format (entries over 4 GiB)")
+    with open(path, 'wb') as file:
+        file.write(BINARY_HEADER.pack(BINARY_MAGIC, len(words), BINARY_BLOCK_SIZE))
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        file.write(b"".join(entries))
+
+# output_format name -> writer(word_counts, path); add an entry here to plug in a new format
+OUTPUT_WRITERS = {
+    "json": write_json,
+    "compact": write_compact_json,
+    "binary": write_binary,
+}
+
+def top_k_words(word_counts, k):
+    """ The k most frequent words, most frequent first, using a bounded heap instead of a full sort """
+    return dict(heapq.nlargest(k, word_counts.items(), key=itemgetter(1)))
+
+class FrequencyIndex:
+    """ Read-only view of a write_binary file: O(log n) lookups on an mmap, nothing is parsed up front """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, self.block_size = BINARY_HEADER.unpack_from(self.map, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary word frequency file (or one in an older format)")
+        self.blocks = -(-self.size // self.block_size)
+        self.offsets_start = BINARY_HEADER.size
+        self.entries_start = self.offsets_start + UINT32.size * (self.blocks + 1)
+
+    def _offset(self, block):
+        return self.entries_start + UINT32.unpack_from(self.map, self.offsets_start + UINT32.size * block)[0]
+
+    def _entry(self, position):
+        """ (word, count, position of the next entry) """
+        length, position = decode_varint(self.map, position)
+        count, position = decode_varint(self.map, position)
+        return self.map[position:position + length], count, position + length
+
+    def get(self, word, default=0):
+        """ Binary search for the block that can hold `word`, then scan it; its count or `default` """
+        key = word.encode("utf-8")
+        low, high = 0, self.blocks  # find the first block starting after `key`
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(self._offset(middle))[0] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return default
+        position, end = self._offset(low - 1), self._offset(low)
+        while position < end:
+            entry_word, count, position = self._entry(position)
+            if entry_word >= key:
+                return count if entry_word == key else default
+        return default
+
+    def __contains__(self, word):
+        return self.get(word, None) is not None
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def count_byte_range(processor, start, end):
+    """ Worker for the parallel mode: count the words inside one byte range of the file """
+    word_counts = Counter()
+    for chunk in processor.read_chunks(start, end):
+        word_counts.update(processor.tokenize(chunk))
+    return word_counts
+
+class WordCountStore:
+    """ SQLite store for incremental runs: a manifest of processed files, their counts and the totals """
+
+    def __init__(self, db_path):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT);
+            CREATE TABLE IF NOT EXISTS file_words (
+                path TEXT, word TEXT, count INTEGER, PRIMARY KEY (path, word)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS word_counts (
+                word TEXT PRIMARY KEY, count INTEGER);
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def setting(self, key):
+        row = self.connection.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_setting(self, key, value):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    def manifest(self):
+        """ {path: (size, mtime_ns, sha256)} of every file already counted """
+        rows = self.connection.execute("SELECT path, size, mtime_ns, sha256 FROM files")
+        return {path: (size, mtime_ns, digest) for path, size, mtime_ns, digest in rows}
+
+    def touch_file(self, path, size, mtime_ns):
+        """ Record a new size/mtime for a file whose content did not change """
+        with self.connection:
+            self.connection.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (size, mtime_ns, path))
+
+    def remove_file(self, path):
+        """ Subtract a file's counts from the totals and forget it """
+        with self.connection:
+            self._subtract(path)
+            self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def replace_file(self, path, size, mtime_ns, digest, word_counts):
+        """ Swap a file's old counts (if any) for new ones, in a single transaction """
+        with self.connection:  # committed per file, so an interrupted run resumes where it stopped
+            self._subtract(path)
+            self.connection.executemany(
+                "INSERT INTO file_words (path, word, count) VALUES (?, ?, ?)",
+                ((path, word, count) for word, count in word_counts.items()))
+            self.connection.executemany(
+                "INSERT INTO word_counts (word, count) VALUES (?, ?) "
+                "ON CONFLICT (word) DO UPDATE SET count = count + excluded.count",
+                word_counts.items())
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, size, mtime_ns, digest))
+
+    def _subtract(self, path):
+        self.connection.execute("""
+            UPDATE word_counts
+            SET count = count - (SELECT f.count FROM file_words f WHERE f.path = ? AND f.word = word_counts.word)
+            WHERE word IN (SELECT word FROM file_words WHERE path = ?)
+        """, (path, path))
+        # Only this file's words can have dropped to zero: no scan of the whole vocabulary
+        self.connection.execute(
+            "DELETE FROM word_counts WHERE count <= 0 AND word IN (SELECT word FROM file_words WHERE path = ?)",
+            (path,))
+        self.connection.execute("DELETE FROM file_words WHERE path = ?", (path,))
+
+    def word_counts(self, limit=None):
+        """ The corpus totals as a dict, or only the `limit` most frequent words """
+        if limit:
+            rows = self.connection.execute(
+                "SELECT word, count FROM word_counts ORDER BY count DESC LIMIT ?", (limit,))
+        else:
+            rows = self.connection.execute("SELECT word, count FROM word_counts ORDER BY rowid")
+        return dict(rows)
+
+    def close(self):
+        self.connection.close()
 
 class TextProcessor:
-    def __init__(self, file_path, output_json):
+    def __init__(self, file_path, output_json, streaming=False, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, state_db=None,
+                 output_format="json", top_k=None):
         """ Initialize variables """
         self.file_path = file_path
         self.output_json = output_json
+        self.streaming = streaming  # read the file block by block instead of all at once
+        self.chunk_size = chunk_size
+        self.workers = workers  # more than 1 counts byte ranges of the file in a process pool
+        self.state_db = state_db  # SQLite file for incremental runs over a corpus directory
+        self.output_format = output_format  # a key of OUTPUT_WRITERS
+        self.top_k = top_k  # keep only the k most frequent words in the output
         # Add a list of stop words in Persian (students can expand it)
         self.stop_words = set([
             "و", "در", "به", "از", "که", "این", "را", "با", "است", "برای",
@@ -23,17 +278,87 @@ class TextProcessor:
         self.close_file()  # call the close file function
         return self.file_content
 
+    def read_chunks(self, start=0, end=None):
+        """ Yield the file content block by block, each block ending on a whitespace """
+        # Every regex in clean_text works inside a single whitespace-separated token,
+        # so cleaning block by block gives the same words as cleaning the whole text.
+        # The unfinished token at the end of a block is carried over to the next one.
+        carry = b""
+        with open(self.file_path, 'rb') as file:
+            file.seek(start)
+            remaining = end - start if end is not None else None
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                block = file.read(size)
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                block = carry + block
+                cut = max(block.rfind(ws) for ws in WHITESPACE_BYTES)
+                if cut < 0:  # a single token longer than the block, keep reading
+                    carry = block
+                    continue
+                carry = block[cut + 1:]
+                yield block[:cut + 1].decode('utf-8')
+        if carry:
+            yield carry.decode('utf-8')
+
+    def split_offsets(self, parts):
+        """ Split the file into at most `parts` byte ranges, each one starting right after a whitespace """
+        size = os.path.getsize(self.file_path)
+        offsets = [0]
+        with open(self.file_path, 'rb') as file:
+            for part in range(1, parts):
+                position = max(size * part // parts, offsets[-1])
+                file.seek(position)
+                while True:
+                    block = file.read(SPLIT_SCAN_SIZE)
+                    if not block:
+                        position = size
+                        break
+                    hits = [i for i in (block.find(ws) for ws in WHITESPACE_BYTES) if i >= 0]
+                    if hits:
+                        position += min(hits) + 1
+                        break
+                    position += len(block)
+                offsets.append(position)
+        offsets.append(size)
+        return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+    def corpus_files(self):
+        """ The input file itself, or every .txt file under the input directory """
+        if not os.path.isdir(self.file_path):
+            return [self.file_path]
+        paths = []
+        for root, _, names in os.walk(self.file_path):
+            paths.extend(os.path.join(root, name) for name in names if name.endswith(".txt"))
+        return sorted(paths)
+
+    def file_hash(self, path):
+        """ SHA-256 of a file's content, read in chunk_size blocks """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(self.chunk_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def iter_words(self):
+        """ Yield the cleaned, non-stopword words of the file one at a time """
+        for chunk in self.read_chunks():
+            yield from self.tokenize(chunk)
+
+    def tokenize(self, text):
+        """ Clean, split and drop stop words in one go, yielding words straight to the counter """
+        cleaned_text = self.clean_text(text)
+        return filterfalse(self.stop_words.__contains__, cleaned_text.split())
+
     def clean_text(self, text):
         """ Clean the text: remove emails, URLs, and punctuation """
-        # Student should complete: Use regex to remove URLs and emails
-        # Example for URLs: r"https?://\S+|www\.\S+"
-        url_pattern = r"https?://\S+|www\.\S+"
-        text = re.sub(url_pattern, "", text)
-        # Example for emails: r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-        email_pattern = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-        text = re.sub(email_pattern, "", text)
+        # Use regex to remove URLs and emails (patterns are compiled at module level)
+        text = remove_urls_and_emails(text)
         # Remove punctuation as well
-        text = re.sub(r"[^\w\s]", "", text)  # removes everything except from characters, digits, whitespaces, underscore
+        text = PUNCTUATION_PATTERN.sub("", text)
         return text
 
     def remove_stopwords(self, words):
@@ -54,22 +379,113 @@ class TextProcessor:
     def save_to_json(self, word_counts):
         """ Save the word frequencies to a JSON file """
         # Student should complete: Write the word counts dictionary to a JSON file
-        with open('word_frequencies.json', 'w', encoding="utf-8") as file:
-            json.dump(word_counts, file, ensure_ascii=False, indent=4)
+        write_json(word_counts, self.output_json)
+
+    def save_results(self, word_counts):
+        """ Save with the writer picked by output_format, keeping only the top_k words if set """
+        if self.top_k:
+            word_counts = top_k_words(word_counts, self.top_k)
+        OUTPUT_WRITERS[self.output_format](word_counts, self.output_json)
 
     def close_file(self):
         self.file.close()
 
     def process(self):
         """ Process the text through all the stages """
+        if self.state_db:
+            self.process_incremental()
+            return
+        if self.workers > 1:
+            self.process_parallel()
+            return
+        if self.streaming:
+            self.process_streaming()
+            return
         text = self.read_file()  # Step 1: Read the file
         cleaned_text = self.clean_text(text)  # Step 2: Clean the text
         words = cleaned_text.split()  # Step 3: Tokenize into words
         filtered_words = self.remove_stopwords(words)  # Step 4: Remove stopwords
         word_counts = self.count_word_frequencies(filtered_words)  # Step 5: Count frequencies
-        self.save_to_json(word_counts)  # Step 6: Save the results
+        self.save_results(word_counts)  # Step 6: Save the results
         print(f"Processing complete! Output saved to {self.output_json}")
 
-# Example usage
-processor = TextProcessor("input.txt", "word_frequencies.json")
-processor.process()
+    def count_words(self):
+        """ Count the words of the file with the streaming or the parallel engine """
+        word_counts = Counter()
+        if self.workers > 1:
+            # Map: count each byte range in its own process, reduce: merge the Counters
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(count_byte_range, self, start, end)
+                           for start, end in self.split_offsets(self.workers)]
+                for future in futures:  # merge in file order so the first-seen order matches process()
+                    word_counts.update(future.result())
+        else:
+            word_counts.update(self.iter_words())  # Steps 1-4 run lazily, one block at a time
+        return word_counts
+
+    def process_streaming(self):
+        """ Same stages as process(), but memory stays bounded by chunk_size """
+        word_counts = self.count_words()
+        self.save_results(word_counts)  # Counter keeps first-seen order, same as process()
+        print(f"Processing complete! Output saved to {self.output_json}")
+
+    def process_parallel(self):
+        """ Same stages as process(), spread over `workers` processes """
+        word_counts = self.count_words()
+        self.save_results(word_counts)
+        print(f"Processing complete! Output saved to {self.output_json}")
+
+    def process_incremental(self):
+        """ Count only new or changed files and keep the corpus totals in the state database """
+        store = WordCountStore(self.state_db)
+        try:
+            manifest = store.manifest()
+            paths = self.corpus_files()
+            changed = False
+
+            for path in manifest.keys() - set(paths):  # deleted since the last run
+                store.remove_file(path)
+                changed = True
+
+            for path in paths:
+                stat = os.stat(path)
+                known = manifest.get(path)
+                if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                    continue  # unchanged: no read at all
+                digest = self.file_hash(path)
+                if known and known[2] == digest:
+                    store.touch_file(path, stat.st_size, stat.st_mtime_ns)  # touched, same content
+                    continue
+                file_processor = copy.copy(self)
+                file_processor.file_path = path
+                store.replace_file(path, stat.st_size, stat.st_mtime_ns, digest, file_processor.count_words())
+                changed = True
+
+            # The output is rewritten too when it was written with another path, format or top_k
+            output_settings = json.dumps([os.path.abspath(self.output_json), self.output_format, self.top_k])
+            if changed or not os.path.exists(self.output_json) or store.setting("output") != output_settings:
+                self.save_results(store.word_counts(self.top_k))
+                store.set_setting("output", output_settings)
+                print(f"Processing complete! Output saved to {self.output_json}")
+            else:
+                print(f"Nothing changed since the last run, {self.output_json} is up to date")
+        finally:
+            store.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count word frequencies in a Persian text file or corpus")
+    parser.add_argument("input", nargs="?", default="input.txt")
+    parser.add_argument("output", nargs="?", default="word_frequencies.json")
+    parser.add_argument("--stream", action="store_true", help="read the input in bounded chunks")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="block size in bytes for --stream and --workers")
+    parser.add_argument("--state-db", help="SQLite file for incremental runs; the input can then be a directory")
+    parser.add_argument("--format", choices=sorted(OUTPUT_WRITERS), default="json", help="output file format")
+    parser.add_argument("--top-k", type=int, help="only write the k most frequent words")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes, 1 runs the serial path")
+    args = parser.parse_args()
+
+    # Example usage
+    processor = TextProcessor(args.input, args.output, streaming=args.stream, chunk_size=args.chunk_size,
+                              workers=args.workers, state_db=args.state_db,
+                              output_format=args.format, top_k=args.top_k)
+    processor.process()
@@ -0,0 +1,68 @@
+"""
+Chunking time of the notebook's token-aware RecursiveCharacterTextSplitter vs PersianTokenSplitter, on the
+normalized pages of the PDFs in data/.
+
+    python benchmark_chunking.py                       # the 8 PDFs once
+    python benchmark_chunking.py --repeat 50 --workers 8
+
+--repeat replicates the corpus to show how both scale (and when the process pool kicks in). Besides
+pages/sec, it reports the chunk count and the largest chunk re-encoded on its own: both splitters must stay
+within --chunk-size tokens.
+"""
+import os
+import time
+import argparse
+import statistics
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from transformers import AutoTokenizer
+
+from rag_index import RAW_DIR, MODEL_NAME, CHUNK_SIZE, CHUNK_OVERLAP, SEPARATORS, normalize_docs
+from pdf_loader import load_pdf
+from persian_chunker import PersianTokenSplitter
+
+
+def describe(name, seconds, pages, chunks, tokenizer):
+    sizes = [len(tokenizer.encode(chunk.page_content, add_special_tokens=False)) for chunk in chunks]
+    print(f"{name:<12}{seconds:>10.3f}{pages / seconds:>12.1f}{len(chunks):>9}"
+          f"{statistics.mean(sizes):>12.1f}{max(sizes):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=RAW_DIR)
+    parser.add_argument("--tokenizer", default=MODEL_NAME, help="tokenizer name or path (fast tokenizer)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--repeat", type=int, default=1, help="replicate the corpus this many times")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="process pool size for the fast splitter")
+    args = parser.parse_args()
+
+    pages = normalize_docs([page for name in sorted(os.listdir(args.data_dir)) if name.lower().endswith(".pdf")
+                            for page in load_pdf(os.path.join(args.data_dir, name))]) * args.repeat
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer, use_fast=True)
+    chunk_size = min(args.chunk_size, (getattr(tokenizer, "model_max_length", 512) or 512) - 32)
+
+    recursive = RecursiveCharacterTextSplitter(
+        separators=SEPARATORS,
+        chunk_size=chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        length_function=lambda s: len(tokenizer.encode(s, add_special_tokens=False)),
+        is_separator_regex=False,
+    )
+    fast = PersianTokenSplitter(tokenizer, chunk_size=chunk_size, chunk_overlap=args.chunk_overlap,
+                                workers=args.workers)
+
+    print(f"{len(pages)} pages, chunk_size {chunk_size}, overlap {args.chunk_overlap}, workers {args.workers}")
+    print(f"{'splitter':<12}{'time (s)':>10}{'pages/s':>12}{'chunks':>9}{'avg tokens':>12}{'max tokens':>12}")
+    timings = {}
+    for name, splitter in (("recursive", recursive), ("fast", fast)):
+        start = time.perf_counter()
+        chunks = splitter.split_documents(pages)
+        timings[name] = time.perf_counter() - start
+        describe(name, timings[name], len(pages), chunks, tokenizer)
+    print(f"speedup: {timings['recursive'] / timings['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Embedding throughput and drift of CPUEmbeddings variants against the notebook's HuggingFaceEmbeddings (fp32),
+on the chatbot's chunks (PDFs in data/, normalized and chunked as rag_index does).
+
+    python benchmark_embeddings.py --threads 4 --batch-size 32
+    python benchmark_embeddings.py --model HooshvareLab/bert-base-parsbert-uncased --no-normalize   # CA_03
+
+Drift is measured two ways: cosine similarity of each chunk's vector to the baseline's, and retrieval
+agreement: for every query (hand-written questions plus a phrase taken from a sample of chunks), the overlap
+of the top-k chunks with the baseline's top-k.
+"""
+import os
+import time
+import random
+import argparse
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from rag_index import RAW_DIR, MODEL_NAME, make_text_splitter, normalize_docs, normalize_fa
+from pdf_loader import CACHE_DIR, load_pdfs
+from cpu_embeddings import CPUEmbeddings
+
+QUESTIONS = [
+    "میتوانی کمی راجب تسهیلات فرزندآوری توضیح بدی.",
+    "سقف وام ازدواج چقدر است؟",
+    "شرایط دریافت وام مسکن چیست؟",
+    "نرخ کارمزد تسهیلات قرض الحسنه چند درصد است؟",
+    "مدارک لازم برای ثبت نام وام چیست؟",
+]
+
+
+def sample_queries(chunks, count, seed=0):
+    """Hand-written questions plus `count` 8-word phrases from random chunks."""
+    rng = random.Random(seed)
+    queries = [normalize_fa(question) for question in QUESTIONS]
+    for chunk in rng.sample(chunks, min(count, len(chunks))):
+        words = chunk.split()
+        start = rng.randrange(max(1, len(words) - 8))
+        queries.append(" ".join(words[start:start + 8]))
+    return queries
+
+
+def top_k(queries, chunks, k):
+    return np.argsort(-(queries @ chunks.T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=RAW_DIR)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=1, help="replicate the chunks this many times")
+    parser.add_argument("--queries", type=int, default=50, help="phrases sampled from chunks as extra queries")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--no-normalize", action="store_true", help="raw vectors (CA_03 uses unnormalized ParsBERT)")
+    parser.add_argument("--no-onnx", action="store_true", help="skip the onnxruntime variants")
+    args = parser.parse_args()
+
+    pdf_paths = [os.path.join(args.data_dir, name) for name in sorted(os.listdir(args.data_dir))
+                 if name.lower().endswith(".pdf")]
+    pages = normalize_docs(load_pdfs(pdf_paths, CACHE_DIR))
+    chunks = [chunk.page_content for chunk in make_text_splitter(args.model).split_documents(pages)]
+    texts = chunks * args.repeat
+    queries = sample_queries(chunks, args.queries)
+    normalize = not args.no_normalize
+
+    variants = [
+        ("fp32", dict()),
+        ("int8", dict(quantize=True)),
+    ]
+    if not args.no_onnx:
+        variants += [("onnx fp32", dict(backend="onnx")), ("onnx int8", dict(backend="onnx", quantize=True))]
+
+    baseline = HuggingFaceEmbeddings(
+        model_name=args.model,
+        encode_kwargs={"normalize_embeddings": normalize},
+        model_kwargs={"trust_remote_code": True},
+    )
+    baseline.embed_documents(texts[:2])  # warm-up, outside the timing
+    start = time.perf_counter()
+    reference = np.array(baseline.embed_documents(texts), dtype=np.float32)
+    reference_seconds = time.perf_counter() - start
+    reference_queries = np.array(baseline.embed_documents(queries), dtype=np.float32)
+
+    def unit(vectors):
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    reference_top = top_k(unit(reference_queries), unit(reference[:len(chunks)]), args.k)
+
+    print(f"{len(texts)} chunks, {len(queries)} queries, model {args.model}, threads {args.threads}, "
+          f"batch {args.batch_size}")
+    print(f"{'engine':<22}{'chunks/s':>10}{'speedup':>9}{'cos mean':>10}{'cos min':>9}{f'top-{args.k} overlap':>15}")
+    print(f"{'HuggingFaceEmbeddings':<22}{len(texts) / reference_seconds:>10.1f}{1:>9.2f}{1:>10.4f}{1:>9.4f}{1:>15.3f}")
+    for name, options in variants:
+        engine = CPUEmbeddings(args.model, batch_size=args.batch_size, threads=args.threads,
+                               normalize=normalize, **options)
+        engine.embed_array(texts[:2])  # loads (and for onnx, exports) the model outside the timing
+        start = time.perf_counter()
+        vectors = engine.embed_array(texts)
+        seconds = time.perf_counter() - start
+        cosine = (unit(vectors) * unit(reference)).sum(axis=1)
+        top = top_k(unit(engine.embed_array(queries)), unit(vectors[:len(chunks)]), args.k)
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(top, reference_top)])
+        print(f"{name:<22}{len(texts) / seconds:>10.1f}{reference_seconds / seconds:>9.2f}"
+              f"{cosine.mean():>10.4f}{cosine.min():>9.4f}{overlap:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Cold and warm start of the loader stage (pdf_loader.py): download + page extraction of the PDFs in data/,
+served by a local HTTP server with a simulated round trip and bandwidth.
+
+    python benchmark_loader.py --latency 0.3 --bandwidth 200 --workers 8
+
+Rows:
+  - sequential: one connection, one process, no cache (what the notebook used to do on an empty data/)
+  - cold: concurrent downloads into an empty directory, extraction in a process pool into an empty cache
+  - warm: the same again; every PDF is a 304, every page comes from the cache (no PDF parsing)
+"""
+import os
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pdf_loader
+from rag_index import RAW_DIR
+
+
+class PDFServer:
+    """Serves {name: bytes} at /<name> with ETag, Last-Modified, 304s and Range/If-Range."""
+
+    def __init__(self, files, latency=0.3, bandwidth=200):
+        self.files = files
+        self.etags = {name: '"%s"' % hashlib.md5(body).hexdigest() for name, body in files.items()}
+        self.last_modified = formatdate(time.time() - 3600, usegmt=True)
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.lstrip("/")
+                time.sleep(latency)
+                if name not in server.files:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, etag = server.files[name], server.etags[name]
+                if self.headers.get("If-None-Match") == etag:
+                    server.requests.append((name, 304))
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                start = 0
+                range_header = self.headers.get("Range")
+                if range_header and self.headers.get("If-Range") in (None, etag):
+                    start = int(range_header.split("=")[1].split("-")[0])
+                status = 206 if start else 200
+                server.requests.append((name, status))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/pdf")
+                self.send_header("Content-Length", str(len(body) - start))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", server.last_modified)
+                if start:
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                self.end_headers()
+                # --bandwidth KB/s per connection
+                step = max(1, bandwidth * 1024 // 20)
+                for offset in range(start, len(body), step):
+                    self.wfile.write(body[offset:offset + step])
+                    time.sleep(0.05)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d" % self.httpd.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run(urls, raw_dir, cache_dir, workers):
+    start = time.perf_counter()
+    outcomes = pdf_loader.download_pdfs(urls, raw_dir, max_workers=workers)
+    downloaded = time.perf_counter()
+    paths = [os.path.join(raw_dir, name) for name in sorted(outcomes) if outcomes[name] != "failed"]
+    pages = pdf_loader.load_pdfs(paths, cache_dir, workers=workers)
+    return downloaded - start, time.perf_counter() - downloaded, len(pages), outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=RAW_DIR)
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated round trip per request (s)")
+    parser.add_argument("--bandwidth", type=int, default=200, help="simulated KB/s per connection")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="download connections / parse processes")
+    args = parser.parse_args()
+
+    files = {}
+    for name in sorted(os.listdir(args.data_dir)):
+        if name.lower().endswith(".pdf"):
+            with open(os.path.join(args.data_dir, name), "rb") as f:
+                files[name] = f.read()
+
+    with PDFServer(files, args.latency, args.bandwidth) as server, tempfile.TemporaryDirectory() as tmp:
+        urls = [f"{server.url}/{name}" for name in files]
+        print(f"{len(files)} PDFs, {sum(map(len, files.values())) / 1024:.0f} KB, "
+              f"latency {args.latency * 1000:.0f} ms, {args.bandwidth} KB/s per connection")
+        print(f"{'run':<12}{'download (s)':>14}{'extract (s)':>13}{'total (s)':>11}{'pages':>7}  outcomes")
+        for name, workers, fresh in (("sequential", 1, True), ("cold", args.workers, True),
+                                     ("warm", args.workers, False)):
+            raw_dir, cache_dir = os.path.join(tmp, "data"), os.path.join(tmp, "cache")
+            if fresh:
+                shutil.rmtree(raw_dir, ignore_errors=True)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            download, extract, pages, outcomes = run(urls, raw_dir, cache_dir, workers)
+            summary = {outcome: list(outcomes.values()).count(outcome) for outcome in set(outcomes.values())}
+            print(f"{name:<12}{download:>14.2f}{extract:>13.2f}{download + extract:>11.2f}{pages:>7}  {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Cold start of a new worker serving the saved Personal_Chatbot index: the old pickle-based formats against
+faiss_store (memory-mapped index.faiss + docstore.sqlite + config.json).
+
+    python benchmark_store.py --runs 5
+    python benchmark_store.py --model ./models/maux-gte-persian --index-dir /tmp/bench_index
+
+Formats, each loaded and queried through an MMR retriever, as the notebook does:
+  - pickle: retriever.pkl, the notebook's old pickle of the whole retriever (embedding model included)
+  - load_local: FAISS.save_local / load_local (index.pkl) + HuggingFaceEmbeddings
+  - store: faiss_store.load_store + CPUEmbeddings named by config.json
+
+Every run is a fresh Python process. "import" (libraries, the same for every format) is reported separately
+from "open" (reading the saved files) and "first query" (including whatever was deferred to it, such as
+loading the model weights); "next query" is a warm query.
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from rag_index import RAW_DIR, INDEX_DIR, MODEL_NAME
+
+FORMATS = ("pickle", "load_local", "store")
+STAGES = ("import", "open", "first query", "next query")
+QUESTION = "سقف وام ازدواج چقدر است؟"
+SEARCH_KWARGS = {"k": 5, "fetch_k": 20, "lambda_mult": 0.5}
+
+
+def hf_embeddings(model_name):
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"normalize_embeddings": True},
+                                 model_kwargs={"trust_remote_code": True})
+
+
+def prepare(index_dir, legacy_dir, data_dir, model_name):
+    """Build (or update) the store, and write the same index in the two legacy formats."""
+    from rag_index import RagIndex
+    from faiss_store import load_store
+
+    RagIndex(index_dir, model_name=model_name).update(data_dir)
+    vectorstore = load_store(index_dir, hf_embeddings(model_name), mmap=False)
+    vectorstore.save_local(legacy_dir)
+    with open(os.path.join(legacy_dir, "retriever.pkl"), "wb") as f:
+        pickle.dump(vectorstore.as_retriever(search_type="mmr", search_kwargs=SEARCH_KWARGS), f)
+    return vectorstore.index.ntotal
+
+
+def worker(fmt, index_dir, legacy_dir, model_name, question):
+    """Runs in the child process; prints the stage timings as JSON."""
+    times = {}
+    start = time.perf_counter()
+    import sentence_transformers  # noqa: F401  (torch + transformers, needed by every format)
+    from langchain_community.vectorstores import FAISS
+    from faiss_store import load_store
+    times["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if fmt == "pickle":
+        with open(os.path.join(legacy_dir, "retriever.pkl"), "rb") as f:
+            retriever = pickle.load(f)
+    elif fmt == "load_local":
+        vectorstore = FAISS.load_local(legacy_dir, hf_embeddings(model_name), allow_dangerous_deserialization=True)
+        retriever = vectorstore.as_retriever(search_type="mmr", search_kwargs=SEARCH_KWARGS)
+    else:
+        retriever = load_store(index_dir).as_retriever(search_type="mmr", search_kwargs=SEARCH_KWARGS)
+    times["open"] = time.perf_counter() - start
+
+    for stage in ("first query", "next query"):
+        start = time.perf_counter()
+        docs = retriever.invoke(question)
+        times[stage] = time.perf_counter() - start
+    times["hits"] = [doc.metadata.get("chunk_id") for doc in docs]
+    print(json.dumps(times))
+
+
+def size_of(directory, names):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in names) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=RAW_DIR)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--question", default=QUESTION)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per format (median reported)")
+    parser.add_argument("--worker", choices=FORMATS, help=argparse.SUPPRESS)
+    parser.add_argument("--legacy-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.index_dir, args.legacy_dir, args.model, args.question)
+        return
+
+    from rag_index import normalize_fa
+    question = normalize_fa(args.question)
+    with tempfile.TemporaryDirectory() as legacy_dir:
+        count = prepare(args.index_dir, legacy_dir, args.data_dir, args.model)
+        sizes = {
+            "pickle": size_of(legacy_dir, ["retriever.pkl"]),
+            "load_local": size_of(legacy_dir, ["index.faiss", "index.pkl"]),
+            "store": size_of(args.index_dir, ["index.faiss", "docstore.sqlite", "config.json"]),
+        }
+        print(f"{count} chunks, model {args.model}, {args.runs} runs per format (median, ms)")
+        print(f"{'format':<12}{'size (KB)':>11}" + "".join(f"{stage:>13}" for stage in STAGES) + f"{'open + first':>14}")
+        hits = {}
+        for fmt in FORMATS:
+            runs = []
+            for _ in range(args.runs):
+                command = [sys.executable, os.path.abspath(__file__), "--worker", fmt, "--index-dir", args.index_dir,
+                           "--legacy-dir", legacy_dir, "--model", args.model, "--question", question]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            hits[fmt] = runs[-1]["hits"]
+            median = {stage: statistics.median(run[stage] for run in runs) * 1000 for stage in STAGES}
+            print(f"{fmt:<12}{sizes[fmt]:>11.0f}" + "".join(f"{median[stage]:>13.1f}" for stage in STAGES)
+                  + f"{median['open'] + median['first query']:>14.1f}")
+        print("same hits as pickle:", {fmt: hits[fmt] == hits["pickle"] for fmt in FORMATS[1:]})
+
+
+if __name__ == "__main__":
+    main()
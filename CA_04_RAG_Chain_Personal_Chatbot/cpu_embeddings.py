@@ -0,0 +1,215 @@
+"""
+CPU embedding engine for the Persian embedding models (ParsBERT in CA_03, maux-gte-persian here), usable
+anywhere LangChain expects `Embeddings` (FAISS.from_documents, RagIndex, ...).
+
+Compared with HuggingFaceEmbeddings' defaults:
+  - Every input is tokenized once, then batches are formed from length-sorted inputs, so each batch is
+    padded only to its own longest member instead of mixing 20-token and 480-token chunks.
+  - `threads` sets the intra-op thread count (torch / onnxruntime).
+  - `quantize=True` applies int8 dynamic quantization to the Linear layers (torch), or to the exported
+    graph (onnx). `backend="onnx"` exports the model once to `onnx_dir` and runs it with onnxruntime.
+  - `dimension` comes from the model config: no throwaway `embed_query("سلام")` to size a FAISS index.
+
+Pooling and max length follow the model's sentence-transformers config (1_Pooling/, sentence_bert_config.json)
+when it has one, else mean pooling, as SentenceTransformer does for plain HF models. Constructing an engine
+reads nothing: configs, tokenizer and weights load on first use, so opening a saved index (faiss_store) doesn't
+wait for the model.
+"""
+import os
+import json
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_NAME = "xmanii/maux-gte-persian"
+ONNX_DIR = os.path.join(".", "onnx_models")
+
+
+def _model_file(model_name: str, filename: str) -> Optional[str]:
+    """Path of an optional file of a local or Hub model, None if the model has no such file."""
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        return path if os.path.exists(path) else None
+    from transformers.utils import cached_file
+    return cached_file(model_name, filename, _raise_exceptions_for_missing_entries=False,
+                       _raise_exceptions_for_connection_errors=False)
+
+
+def _read_json(model_name: str, filename: str) -> dict:
+    path = _model_file(model_name, filename)
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CPUEmbeddings(Embeddings):
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = 32, threads: Optional[int] = None,
+                 quantize: bool = False, backend: str = "torch", normalize: bool = True,
+                 max_length: Optional[int] = None, pooling: Optional[str] = None,
+                 trust_remote_code: bool = True, onnx_dir: str = ONNX_DIR):
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"backend must be 'torch' or 'onnx', not {backend!r}")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads or os.cpu_count() or 1
+        self.quantize = quantize
+        self.backend = backend
+        self.normalize = normalize
+        self.trust_remote_code = trust_remote_code
+        self.onnx_dir = onnx_dir
+
+        if pooling not in (None, "cls", "mean"):
+            raise ValueError(f"pooling must be 'cls' or 'mean', not {pooling!r}")
+        self._pooling = pooling
+        self._max_length = max_length
+
+        self._config = None
+        self._tokenizer = None
+        self._run = None
+
+    @property
+    def config(self):
+        if self._config is None:
+            from transformers import AutoConfig
+            self._config = AutoConfig.from_pretrained(self.model_name, trust_remote_code=self.trust_remote_code)
+        return self._config
+
+    @property
+    def dimension(self) -> int:
+        """Output vector size, read from the model config (no weights loaded, no inference)."""
+        return self.config.hidden_size
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True,
+                                                            trust_remote_code=self.trust_remote_code)
+        return self._tokenizer
+
+    @property
+    def pooling(self) -> str:
+        if self._pooling is None:
+            pooling_config = _read_json(self.model_name, os.path.join("1_Pooling", "config.json"))
+            self._pooling = "cls" if pooling_config.get("pooling_mode_cls_token") else "mean"
+        return self._pooling
+
+    @property
+    def max_length(self) -> int:
+        if self._max_length is None:
+            self._max_length = _read_json(self.model_name, "sentence_bert_config.json").get("max_seq_length")
+        if self._max_length is None:
+            limits = [self.tokenizer.model_max_length, getattr(self.config, "max_position_embeddings", 512), 8192]
+            self._max_length = min(limit for limit in limits if limit)
+        return self._max_length
+
+    def _load_torch_model(self):
+        import torch
+        from transformers import AutoModel
+
+        torch.set_num_threads(self.threads)
+        model = AutoModel.from_pretrained(self.model_name, trust_remote_code=self.trust_remote_code).eval()
+        return model
+
+    def _load_torch(self):
+        import torch
+
+        model = self._load_torch_model()
+        if self.quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        def run(batch):
+            with torch.inference_mode():
+                return model(**{key: torch.from_numpy(value) for key, value in batch.items()})[0].float().numpy()
+        return run
+
+    def _export_onnx(self, path: str, input_names: List[str]) -> None:
+        import torch
+
+        class Encoder(torch.nn.Module):
+            """The model with positional inputs and only the last hidden state as output, for tracing."""
+
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs)))[0]
+
+        model = Encoder(self._load_torch_model())
+        sample = self.tokenizer(["سلام", "سلام دنیا"], padding=True, return_tensors="pt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: {0: "batch", 1: "tokens"} for name in input_names},
+                          "last_hidden_state": {0: "batch", 1: "tokens"}},
+            opset_version=14,
+            dynamo=False,
+        )
+        os.replace(tmp_path, path)
+
+    def _load_onnx(self):
+        import onnxruntime as ort
+
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                       if name in self.tokenizer.model_input_names]
+        model_dir = os.path.join(self.onnx_dir, self.model_name.strip("/").replace("/", "__"))
+        path = os.path.join(model_dir, "model.onnx")
+        if not os.path.exists(path):
+            self._export_onnx(path, input_names)
+        if self.quantize:
+            quantized_path = os.path.join(model_dir, "model.int8.onnx")
+            if not os.path.exists(quantized_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+            path = quantized_path
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        names = [node.name for node in session.get_inputs()]
+
+        def run(batch):
+            return session.run(None, {name: batch[name] for name in names})[0]
+        return run
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dimension) float32 embeddings, in input order."""
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return vectors
+        if self._run is None:
+            self._run = self._load_onnx() if self.backend == "onnx" else self._load_torch()
+
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        keys = [key for key in encoded.keys() if key in ("input_ids", "attention_mask", "token_type_ids")]
+        order = sorted(range(len(texts)), key=lambda i: len(encoded["input_ids"][i]))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            batch = self.tokenizer.pad({key: [encoded[key][i] for i in rows] for key in keys}, return_tensors="np")
+            batch = {key: batch[key].astype(np.int64) for key in keys}
+            vectors[rows] = self._pool(self._run(batch), batch["attention_mask"])
+
+        if self.normalize:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
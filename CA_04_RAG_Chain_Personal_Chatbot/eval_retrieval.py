@@ -0,0 +1,113 @@
+"""
+Latency and recall@k of dense (FAISS), sparse (BM25) and hybrid (RRF) retrieval over the data/ PDFs.
+
+    python eval_retrieval.py                  # builds/updates the index first (incremental)
+    python eval_retrieval.py -k 1,5,10 --synthetic 200
+
+Two query sets:
+  - labelled: eval_queries.jsonl, questions with the PDFs that answer them; a hit is any retrieved chunk
+    from one of those PDFs.
+  - synthetic: known-item queries, an 8-word phrase cut from a random chunk; a hit is any retrieved chunk
+    that contains the phrase (overlapping chunks can).
+Latency is per query, including query normalization and embedding.
+"""
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+
+from rag_index import RAW_DIR, INDEX_DIR, MODEL_NAME, RagIndex, normalize_fa
+
+QUERIES_FILE = "eval_queries.jsonl"
+
+
+def labelled_queries(path, docstore, ids):
+    """[(question, {relevant chunk IDs})] from the labelled file."""
+    by_source = {}
+    for doc_id in ids:
+        source = os.path.basename(docstore.search(doc_id).metadata.get("source", ""))
+        by_source.setdefault(source, set()).add(doc_id)
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                relevant = set().union(*(by_source.get(source, set()) for source in record["sources"]))
+                queries.append((record["question"], relevant))
+    return queries
+
+
+def synthetic_queries(count, docstore, ids, seed=0):
+    """[(phrase, {IDs of chunks containing it})] for phrases cut from random chunks."""
+    rng = random.Random(seed)
+    texts = {doc_id: docstore.search(doc_id).page_content for doc_id in ids}
+    queries = []
+    for doc_id in rng.sample(ids, min(count, len(ids))):
+        words = texts[doc_id].split()
+        start = rng.randrange(max(1, len(words) - 8))
+        phrase = " ".join(words[start:start + 8])
+        queries.append((phrase, {other for other, text in texts.items() if phrase in text}))
+    return queries
+
+
+def evaluate(rank, queries, ks):
+    latencies, hits = [], {k: 0 for k in ks}
+    for question, relevant in queries:
+        start = time.perf_counter()
+        ranking = rank(question)
+        latencies.append(time.perf_counter() - start)
+        for k in ks:
+            hits[k] += bool(relevant & set(ranking[:k]))
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000,
+        **{f"recall@{k}": hits[k] / len(queries) for k in ks},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=RAW_DIR)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--queries", default=QUERIES_FILE, help="labelled queries (JSONL: question, sources)")
+    parser.add_argument("--synthetic", type=int, default=100, help="known-item queries sampled from chunks")
+    parser.add_argument("-k", default="1,5,10", help="comma-separated cut-offs")
+    parser.add_argument("--fetch-k", type=int, default=20, help="candidates per retriever before fusion")
+    parser.add_argument("--no-build", action="store_true", help="use the saved index as is")
+    args = parser.parse_args()
+    ks = [int(k) for k in args.k.split(",")]
+
+    index = RagIndex(args.index_dir, model_name=args.model)
+    if not args.no_build:
+        index.update(args.data_dir)
+    retriever = index.hybrid_retriever(k=max(ks), fetch_k=max(args.fetch_k, max(ks)))
+    vectorstore = retriever.vectorstore
+    ids = [vectorstore.index_to_docstore_id[i] for i in range(len(vectorstore.index_to_docstore_id))]
+    retriever.dense_ranking("warm-up")  # loads the embedding model outside the timings
+
+    methods = {
+        "dense": lambda q: retriever.dense_ranking(normalize_fa(q), max(ks)),
+        "bm25": lambda q: retriever.sparse_ranking(q, max(ks)),
+        "hybrid": lambda q: [doc_id for doc_id, _ in retriever.rank(q)],
+    }
+    query_sets = {"synthetic": synthetic_queries(args.synthetic, vectorstore.docstore, ids)}
+    if os.path.exists(args.queries):
+        query_sets = {"labelled": labelled_queries(args.queries, vectorstore.docstore, ids), **query_sets}
+
+    print(f"{len(ids)} chunks, model {args.model}")
+    header = f"{'queries':<16}{'method':<8}{'p50 (ms)':>10}{'p99 (ms)':>10}" + "".join(f"{f'R@{k}':>8}" for k in ks)
+    print(header)
+    for set_name, queries in query_sets.items():
+        for name, rank in methods.items():
+            result = evaluate(rank, queries, ks)
+            label = f"{set_name} ({len(queries)})"
+            print(f"{label:<16}{name:<8}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                  + "".join(f"{result[f'recall@{k}']:>8.3f}" for k in ks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Pickle-free persistence for the Personal_Chatbot FAISS index: what FAISS.save_local / load_local do, without
+the docstore pickle (index.pkl) and so without `allow_dangerous_deserialization`.
+
+    index.faiss       the FAISS index (faiss.write_index, as save_local writes it)
+    docstore.sqlite   one row per vector: (row, chunk ID, text, metadata as JSON)
+    config.json       embedding model, vector dimension and count, distance, normalization
+
+load_store() maps index.faiss read-only (the vectors are not copied: pages are read when a search touches them,
+and workers on the same machine share them) and reads only the row -> chunk ID column; a chunk's text and metadata are fetched by
+primary key when it is a hit. The embedding model is the one named in config.json, and CPUEmbeddings loads it
+on the first query, not at load time.
+
+save_store() replaces each file atomically; a worker that still has the old index mapped keeps a valid view.
+"""
+import os
+import json
+import sqlite3
+import pathlib
+import threading
+from contextlib import closing
+from typing import Dict, Iterator, Tuple, Union
+
+import faiss
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+CONFIG_FILE = "config.json"
+PICKLE_FILE = "index.pkl"  # written by FAISS.save_local; save_store removes it
+STORE_FORMAT = 1
+# IO_FLAG_MMAP_IFC maps flat (IndexFlatCodes) indexes too; older faiss versions only map IVF lists
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
+class SQLiteDocstore(Docstore):
+    """Read-only docstore over docstore.sqlite. Each thread opens its own connection on first use."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            uri = pathlib.Path(self.path).resolve().as_uri() + "?mode=ro"
+            connection = self._local.connection = sqlite3.connect(uri, uri=True)
+        return connection
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self.connection.execute("SELECT page_content, metadata FROM chunks WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def row_ids(self) -> Dict[int, str]:
+        """{FAISS row: chunk ID}, the vector store's index_to_docstore_id."""
+        # Answered from the ID index alone (it covers the row), without reading the chunk texts
+        return dict(self.connection.execute("SELECT row, id FROM chunks"))
+
+    def to_memory(self) -> InMemoryDocstore:
+        """Every chunk in an InMemoryDocstore, for a vector store that is going to be modified."""
+        return InMemoryDocstore({
+            doc_id: Document(page_content=text, metadata=json.loads(metadata))
+            for doc_id, text, metadata in self.connection.execute("SELECT id, page_content, metadata FROM chunks")
+        })
+
+
+class MappedFAISS(FAISS):
+    """FAISS over a memory-mapped index. Read-only: faiss aborts the process on a write to mapped storage."""
+
+    def _read_only(self, *args, **kwargs):
+        raise ValueError("The index is memory-mapped; load it with load_store(..., mmap=False) to modify it")
+
+    add_texts = add_embeddings = delete = merge_from = _read_only
+
+
+def store_exists(index_dir: str) -> bool:
+    return all(os.path.exists(os.path.join(index_dir, name)) for name in (INDEX_FILE, DOCSTORE_FILE, CONFIG_FILE))
+
+
+def remove_store(index_dir: str) -> None:
+    """Delete the files save_store (or FAISS.save_local) wrote in index_dir, if any."""
+    for name in (INDEX_FILE, DOCSTORE_FILE, CONFIG_FILE, PICKLE_FILE):
+        if os.path.exists(os.path.join(index_dir, name)):
+            os.remove(os.path.join(index_dir, name))
+
+
+def read_config(index_dir: str) -> dict:
+    with open(os.path.join(index_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _embedding_settings(embeddings) -> dict:
+    """Model name and output normalization of CPUEmbeddings or HuggingFaceEmbeddings."""
+    normalize = getattr(embeddings, "normalize", None)
+    if normalize is None:
+        normalize = bool((getattr(embeddings, "encode_kwargs", None) or {}).get("normalize_embeddings", False))
+    return {"embedding_model": getattr(embeddings, "model_name", None), "normalize_embeddings": normalize}
+
+
+def _rows(vectorstore: FAISS) -> Iterator[Tuple[int, str, str, str]]:
+    for row, doc_id in sorted(vectorstore.index_to_docstore_id.items()):
+        doc = vectorstore.docstore.search(doc_id)
+        yield row, doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str)
+
+
+def save_store(vectorstore: FAISS, index_dir: str) -> None:
+    """Write index.faiss, docstore.sqlite and config.json for a LangChain FAISS vector store."""
+    os.makedirs(index_dir, exist_ok=True)
+    paths = {name: os.path.join(index_dir, name) for name in (INDEX_FILE, DOCSTORE_FILE, CONFIG_FILE)}
+    for path in paths.values():
+        if os.path.exists(path + ".tmp"):
+            os.remove(path + ".tmp")
+
+    faiss.write_index(vectorstore.index, paths[INDEX_FILE] + ".tmp")
+    with closing(sqlite3.connect(paths[DOCSTORE_FILE] + ".tmp")) as connection:
+        connection.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+                           "page_content TEXT NOT NULL, metadata TEXT NOT NULL)")
+        connection.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", _rows(vectorstore))
+        connection.commit()
+    config = {
+        "format": STORE_FORMAT,
+        **_embedding_settings(vectorstore.embeddings),
+        "dimension": vectorstore.index.d,
+        "count": vectorstore.index.ntotal,
+        "distance_strategy": DistanceStrategy(vectorstore.distance_strategy).value,
+        "normalize_L2": bool(getattr(vectorstore, "_normalize_L2", False)),
+    }
+    with open(paths[CONFIG_FILE] + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=1)
+
+    for path in paths.values():
+        os.replace(path + ".tmp", path)
+    if os.path.exists(os.path.join(index_dir, PICKLE_FILE)):
+        os.remove(os.path.join(index_dir, PICKLE_FILE))
+
+
+def load_store(index_dir: str, embeddings=None, mmap: bool = True) -> FAISS:
+    """
+    The saved index as a LangChain FAISS vector store.
+    mmap=True (serving): a MappedFAISS; the index is mapped read-only and chunks are read from SQLite per hit.
+    mmap=False (updating): index and chunks are read into memory, so add_documents / delete work.
+    `embeddings` defaults to CPUEmbeddings of the model named in config.json; given ones must be for that model.
+    """
+    if not store_exists(index_dir):
+        raise FileNotFoundError(f"No saved index in {index_dir}: run `python rag_index.py build` "
+                                "(indexes saved by FAISS.save_local are rebuilt by it)")
+    config = read_config(index_dir)
+    model_name = getattr(embeddings, "model_name", None)
+    if model_name is not None and config["embedding_model"] is not None and model_name != config["embedding_model"]:
+        raise ValueError(f"{index_dir} was built with {config['embedding_model']!r}, not {model_name!r}")
+    if embeddings is None:
+        if config["embedding_model"] is None:
+            raise ValueError(f"{CONFIG_FILE} in {index_dir} names no embedding model; pass `embeddings`")
+        from cpu_embeddings import CPUEmbeddings
+        embeddings = CPUEmbeddings(config["embedding_model"], normalize=config["normalize_embeddings"])
+
+    index = faiss.read_index(os.path.join(index_dir, INDEX_FILE), MMAP_FLAGS if mmap else 0)
+    docstore = SQLiteDocstore(os.path.join(index_dir, DOCSTORE_FILE))
+    index_to_docstore_id = docstore.row_ids()
+    if not index.ntotal == len(index_to_docstore_id) == config["count"]:
+        raise ValueError(f"{index_dir}: index, docstore and config disagree on the number of chunks "
+                         "(interrupted save?); run `python rag_index.py build --rebuild`")
+    if not mmap:
+        memory_docstore = docstore.to_memory()
+        docstore.close()
+        docstore = memory_docstore
+    return (MappedFAISS if mmap else FAISS)(embeddings, index, docstore, index_to_docstore_id,
+                 normalize_L2=config["normalize_L2"],
+                 distance_strategy=DistanceStrategy(config["distance_strategy"]))
@@ -0,0 +1,149 @@
+"""
+Hybrid retrieval for the Personal_Chatbot index: BM25 over the chunk texts + the saved FAISS index,
+fused with reciprocal rank fusion (RRF). No external service, nothing to refit at query time.
+
+The sparse side is a precomputed inverted index: one (terms x chunks) CSR matrix whose entries already are
+the BM25 weights idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len)). Scoring a query is
+summing the rows of its terms, so it costs a few sparse rows, not a pass over the corpus. It lives next to
+the FAISS files as `bm25.npz` (scipy, compressed) + `bm25.json` (vocabulary, chunk IDs, k1, b) - no pickle.
+
+Terms are the word tokens of `normalize_fa` output (split on ZWNJ too, so "بانک‌های" also matches "بانک").
+RagIndex.update() rebuilds the BM25 files whenever the FAISS index changes.
+"""
+import os
+import re
+import json
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from rag_index import normalize_fa
+
+BM25_MATRIX_FILE = "bm25.npz"
+BM25_META_FILE = "bm25.json"
+WORD = re.compile(r"\w+")
+
+
+def tokenize_fa(text: str) -> List[str]:
+    """Word tokens of already-normalized Persian text (ZWNJ and punctuation split words)."""
+    return WORD.findall(text.lower())
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class BM25Index:
+    def __init__(self, matrix: sparse.csr_matrix, vocabulary: List[str], ids: List[str], k1: float, b: float):
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.ids = ids
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def build(cls, texts: List[str], ids: List[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """BM25 weights of every (term, chunk) pair, from normalized chunk texts."""
+        term_ids = {}
+        rows, cols, tfs, lengths = [], [], [], []
+        for col, text in enumerate(texts):
+            tokens = tokenize_fa(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                rows.append(term_ids.setdefault(term, len(term_ids)))
+                cols.append(col)
+                tfs.append(tf)
+
+        rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+        tfs, lengths = np.array(tfs, dtype=np.float32), np.array(lengths, dtype=np.float32)
+        count = len(texts)
+        df = np.bincount(rows, minlength=len(term_ids)).astype(np.float32)
+        idf = np.log1p((count - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths[cols] / max(float(lengths.mean()) if count else 0.0, 1.0))
+        weights = idf[rows] * tfs * (k1 + 1) / (tfs + norm)
+        matrix = sparse.csr_matrix((weights.astype(np.float32), (rows, cols)), shape=(len(term_ids), count))
+        return cls(matrix, list(term_ids), list(ids), k1, b)
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """(chunk ID, score) of the best k chunks with any query term, best first."""
+        rows = sorted({self.term_ids[term] for term in tokenize_fa(normalize_fa(query)) if term in self.term_ids})
+        if not rows:
+            return []
+        scores = np.asarray(self.matrix[rows].sum(axis=0)).ravel()
+        return [(self.ids[i], float(scores[i])) for i in _top(scores, k) if scores[i] > 0]
+
+    def save(self, index_dir: str) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        matrix_path = os.path.join(index_dir, BM25_MATRIX_FILE)
+        meta_path = os.path.join(index_dir, BM25_META_FILE)
+        sparse.save_npz(matrix_path + ".tmp.npz", self.matrix, compressed=True)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "vocabulary": self.vocabulary, "ids": self.ids},
+                      f, ensure_ascii=False)
+        os.replace(matrix_path + ".tmp.npz", matrix_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["BM25Index"]:
+        meta_path = os.path.join(index_dir, BM25_META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = sparse.load_npz(os.path.join(index_dir, BM25_MATRIX_FILE)).tocsr()
+        return cls(matrix, meta["vocabulary"], meta["ids"], meta["k1"], meta["b"])
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, **kwargs) -> "BM25Index":
+        """BM25 over every chunk of a LangChain FAISS store, keyed by its docstore IDs."""
+        ids = [vectorstore.index_to_docstore_id[i] for i in range(len(vectorstore.index_to_docstore_id))]
+        return cls.build([vectorstore.docstore.search(i).page_content for i in ids], ids, **kwargs)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], weights: List[float], rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """Fused (ID, score) pairs, best first: score = sum of weight / (rrf_k + rank) over the rankings."""
+    scores = Counter()
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += weight / (rrf_k + rank)
+    return scores.most_common()
+
+
+class HybridRetriever(BaseRetriever):
+    """LangChain retriever: top `k` chunks by RRF of the FAISS top `fetch_k` and the BM25 top `fetch_k`."""
+
+    vectorstore: Any
+    bm25: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+    dense_weight: float = 1.0
+    sparse_weight: float = 1.0
+
+    def dense_ranking(self, query: str, k: Optional[int] = None) -> List[str]:
+        """Docstore IDs of the nearest chunks in the FAISS index, best first."""
+        vector = np.array([self.vectorstore.embeddings.embed_query(query)], dtype=np.float32)
+        if getattr(self.vectorstore, "_normalize_L2", False):
+            vector /= np.maximum(np.linalg.norm(vector, axis=1, keepdims=True), 1e-12)
+        _, rows = self.vectorstore.index.search(vector, k or self.fetch_k)
+        return [self.vectorstore.index_to_docstore_id[int(row)] for row in rows[0] if row != -1]
+
+    def sparse_ranking(self, query: str, k: Optional[int] = None) -> List[str]:
+        return [doc_id for doc_id, _ in self.bm25.search(query, k or self.fetch_k)]
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        return reciprocal_rank_fusion([self.dense_ranking(normalize_fa(query)), self.sparse_ranking(query)],
+                                      [self.dense_weight, self.sparse_weight], self.rrf_k)[:self.k]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [self.vectorstore.docstore.search(doc_id) for doc_id, _ in self.rank(query)]
@@ -0,0 +1,236 @@
+"""
+Loader stage of Personal_Chatbot.ipynb: download the PDFs listed in links.txt, extract their pages.
+
+Download
+  - All URLs at once over one pooled `requests.Session` (`max_workers` connections, retries with backoff).
+  - Conditional GETs: the ETag / Last-Modified of every saved file is kept in `data/.downloads.json`, and
+    sent back as If-None-Match / If-Modified-Since, so an unchanged PDF costs one 304 and no body.
+  - Resumable: bodies are written to `<name>.part` first. An interrupted download resumes with a Range
+    request guarded by If-Range (if the server's copy changed meanwhile, it answers 200 and we start over).
+
+Extraction
+  - Per-page text is cached in `cached_extracted_data/<sha256 of the PDF>.jsonl`, keyed by content, not by
+    name or mtime: a re-downloaded but identical PDF is never parsed again, a changed one always is.
+  - PDFs missing from the cache are parsed in a process pool (PyPDF is pure Python, so threads would not help).
+"""
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from langchain_core.documents import Document
+
+RAW_DIR = os.path.join(".", "data")
+CACHE_DIR = os.path.join(".", "cached_extracted_data")
+DOWNLOAD_STATE_FILE = ".downloads.json"
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0 Safari/537.36"
+    )
+}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_session(max_workers: int = 8, retries: int = 3) -> requests.Session:
+    """A Session whose connection pool fits max_workers concurrent downloads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=max_workers,
+        pool_maxsize=max_workers,
+        max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+class _DownloadState:
+    """ETag/Last-Modified per file (complete or .part), persisted after every change."""
+
+    def __init__(self, raw_dir: str):
+        self.path = os.path.join(raw_dir, DOWNLOAD_STATE_FILE)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, key: str) -> dict:
+        with self.lock:
+            return dict(self.entries.get(key) or {})
+
+    def set(self, key: str, value: Optional[dict]) -> None:
+        with self.lock:
+            if value is None:
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = value
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+
+def _validators(url: str, response) -> dict:
+    return {"url": url, "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")}
+
+
+def download_pdf(session: requests.Session, url: str, pdf_path: str, state: _DownloadState,
+                 timeout: float = 60) -> str:
+    """Download url to pdf_path unless unchanged. Returns "downloaded", "resumed", "not modified" or "skipped"."""
+    name = os.path.basename(pdf_path)
+    part_path = pdf_path + ".part"
+    headers = {}
+
+    saved = state.get(name)
+    if os.path.exists(pdf_path) and saved.get("url") == url:
+        if saved.get("etag"):
+            headers["If-None-Match"] = saved["etag"]
+        if saved.get("last_modified"):
+            headers["If-Modified-Since"] = saved["last_modified"]
+
+    partial = state.get(name + ".part")
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset and partial.get("url") == url and (partial.get("etag") or partial.get("last_modified")):
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = partial.get("etag") or partial["last_modified"]
+    else:
+        offset = 0
+
+    with session.get(url, headers=headers, stream=True, allow_redirects=True, timeout=timeout) as resp:
+        if resp.status_code == 304:
+            return "not modified"
+        resp.raise_for_status()
+        # Only save if server actually returns a PDF
+        ctype = resp.headers.get("Content-Type", "")
+        if "application/pdf" not in ctype.lower():
+            print(f"⚠️ Skipped: URL did not return a PDF (Content-Type={ctype}) -> {url}")
+            return "skipped"
+
+        resumed = resp.status_code == 206 and offset > 0
+        if not resumed:
+            state.set(name + ".part", _validators(url, resp))
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for chunk in resp.iter_content(chunk_size=1 << 16):
+                if chunk:
+                    f.write(chunk)
+        validators = state.get(name + ".part") if resumed else _validators(url, resp)
+
+    os.replace(part_path, pdf_path)
+    state.set(name, validators)
+    state.set(name + ".part", None)
+    return "resumed" if resumed else "downloaded"
+
+
+def download_pdfs(urls: List[str], raw_dir: str = RAW_DIR, max_workers: int = 8, timeout: float = 60) -> Dict[str, str]:
+    """Fetch all urls concurrently into raw_dir as doc_<n>.pdf; returns {file name: outcome}."""
+    os.makedirs(raw_dir, exist_ok=True)
+    state = _DownloadState(raw_dir)
+    session = make_session(max_workers)
+
+    def fetch(idx_url):
+        idx, url = idx_url
+        file_name = f"doc_{idx}.pdf"  # predictable names to avoid .aspx confusion
+        try:
+            return file_name, download_pdf(session, url, os.path.join(raw_dir, file_name), state, timeout)
+        except requests.RequestException as e:
+            print(f"❌ Error downloading {url}: {e}")
+            return file_name, "failed"
+
+    try:
+        with ThreadPoolExecutor(max_workers) as pool:
+            return dict(pool.map(fetch, enumerate(urls, start=1)))
+    finally:
+        session.close()
+
+
+def load_pdf(pdf_path: str) -> List[Document]:
+    """Per-page Documents of one PDF."""
+    from langchain_community.document_loaders import PyPDFLoader
+    return PyPDFLoader(pdf_path).load()
+
+
+def _extract(pdf_path: str):
+    """(page records, None), or (None, error message) for a PDF that cannot be parsed."""
+    try:
+        return [{"page_content": d.page_content, "metadata": d.metadata or {}} for d in load_pdf(pdf_path)], None
+    except Exception as e:
+        return None, str(e)
+
+
+def cache_path_for(cache_dir: str, sha256: str) -> str:
+    """Return the cache file path (JSONL) of a PDF, based on its content hash."""
+    return os.path.join(cache_dir, f"{sha256}.jsonl")
+
+
+def write_cache(jsonl_path: str, records: List[dict]) -> None:
+    tmp_path = jsonl_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, jsonl_path)
+
+
+def read_cache(jsonl_path: str) -> List[dict]:
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def load_pdfs(pdf_paths: Iterable[str], cache_dir: str = CACHE_DIR, workers: Optional[int] = None,
+              hashes: Optional[Dict[str, str]] = None, errors: Optional[Dict[str, str]] = None) -> List[Document]:
+    """
+    Per-page Documents of all pdf_paths, in order. Pages come from the content-hash cache when possible;
+    the remaining PDFs are parsed in a process pool and cached. `hashes` ({path: sha256}) skips re-hashing.
+    A PDF that fails to parse has no pages and is not cached; `errors`, if given, gets {path: error} for it.
+    """
+    pdf_paths = list(pdf_paths)
+    os.makedirs(cache_dir, exist_ok=True)
+    hashes = dict(hashes or {})
+    for path in pdf_paths:
+        if path not in hashes:
+            hashes[path] = file_sha256(path)
+
+    records = {}
+    missing = []
+    for path in pdf_paths:
+        jsonl_cache = cache_path_for(cache_dir, hashes[path])
+        if os.path.exists(jsonl_cache):
+            records[path] = read_cache(jsonl_cache)
+        elif path not in missing:
+            missing.append(path)
+
+    if missing:
+        workers = min(workers or os.cpu_count() or 1, len(missing))
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(_extract, missing))
+        else:
+            results = [_extract(path) for path in missing]
+        for path, (pages, error) in zip(missing, results):
+            if error is not None:
+                print(f"❌ Error parsing {path}: {error}")
+                records[path] = []
+                if errors is not None:
+                    errors[path] = error
+                continue
+            write_cache(cache_path_for(cache_dir, hashes[path]), pages)
+            records[path] = pages
+
+    # The cache is keyed by content, so the same PDF may have been cached under another name
+    return [Document(page_content=record["page_content"], metadata={**record["metadata"], "source": path})
+            for path in pdf_paths for record in records[path]]
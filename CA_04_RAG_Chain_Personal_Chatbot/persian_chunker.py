@@ -0,0 +1,130 @@
+"""
+Token-aware chunking for (normalized) Persian text that tokenizes each document once.
+
+RecursiveCharacterTextSplitter with `length_function=token_len` re-encodes every candidate piece at every
+level of its recursion, and again while merging pieces. Here a fast (Rust) tokenizer encodes whole documents
+in one batched call with offset mapping; chunks are then cut directly in token space:
+
+  - a chunk is at most `chunk_size` tokens of the document's own tokenization,
+  - its end is snapped back to the last separator (same priority order as the notebook's splitter:
+    paragraph, line, `۔ . ؟ ! ؛ : ، ٬`, space) in the second half of the window,
+  - the next chunk starts `chunk_overlap` tokens earlier, moved forward to the start of a word.
+
+`split_documents` spreads large document lists over a process pool (each worker gets its own copy of the
+tokenizer); small lists stay in-process, where one batched encode already uses every core.
+"""
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain.text_splitter import TextSplitter
+
+SEPARATORS = ["\n\n", "\n", "۔", ".", "؟", "!", "؛", ":", "،", "٬", " ", ""]
+MIN_DOCS_PER_WORKER = 32  # below this, process start-up and pickling cost more than they save
+
+_worker_splitter = None
+
+
+def _init_worker(splitter):
+    global _worker_splitter
+    _worker_splitter = splitter
+
+
+def _split_in_worker(texts):
+    return _worker_splitter.split_texts_with_offsets(texts)
+
+
+class PersianTokenSplitter(TextSplitter):
+    """ Drop-in for the notebook's token-aware RecursiveCharacterTextSplitter, one tokenizer call per batch """
+
+    def __init__(self, tokenizer, chunk_size: int = 480, chunk_overlap: int = 72,
+                 separators: Optional[List[str]] = None, workers: Optional[int] = None, **kwargs):
+        if isinstance(tokenizer, str):
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer, use_fast=True)
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("PersianTokenSplitter needs a fast tokenizer (for offset mapping)")
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                         length_function=self.token_len, **kwargs)
+        self.tokenizer = tokenizer
+        self.separators = [sep for sep in (separators or SEPARATORS) if sep]
+        self.workers = workers or os.cpu_count() or 1
+
+    def token_len(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def _offsets(self, texts: List[str]) -> List[List[Tuple[int, int]]]:
+        # verbose=False: documents are longer than the model's max length on purpose, no warning needed
+        return self.tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True,
+                              return_attention_mask=False, return_token_type_ids=False,
+                              verbose=False)["offset_mapping"]
+
+    def _is_word_start(self, text: str, char: int) -> bool:
+        return char == 0 or text[char - 1].isspace() or text[char - 1] in self.separators
+
+    def _cut(self, text: str, offsets: List[Tuple[int, int]]) -> List[Tuple[int, str]]:
+        """ (start char, chunk text) pairs of one document, given its token offsets """
+        chunks = []
+        ends = [end for _, end in offsets]
+        count = len(offsets)
+        start = 0
+        while start < count:
+            stop = min(start + self._chunk_size, count)
+            if stop < count:
+                # Cut at the highest-priority separator in the second half of the window
+                # (never inside the overlap, so every chunk moves forward)
+                earliest = offsets[min(start + max(self._chunk_size // 2, self._chunk_overlap + 1), stop - 1)][0]
+                for sep in self.separators:
+                    position = text.rfind(sep, earliest, offsets[stop - 1][1])
+                    if position >= 0:
+                        snapped = bisect_right(ends, position + len(sep), lo=start, hi=stop)
+                        if snapped > start + self._chunk_overlap:
+                            stop = snapped
+                            break
+            begin, end = offsets[start][0], offsets[stop - 1][1]
+            chunk = text[begin:end]
+            if self._strip_whitespace:
+                stripped = chunk.lstrip()
+                begin += len(chunk) - len(stripped)
+                chunk = stripped.rstrip()
+            if chunk:
+                chunks.append((begin, chunk))
+            if stop >= count:
+                break
+            start = max(stop - self._chunk_overlap, start + 1)
+            while start < stop and not self._is_word_start(text, offsets[start][0]):
+                start += 1
+        return chunks
+
+    def split_texts_with_offsets(self, texts: List[str]) -> List[List[Tuple[int, str]]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return [self._cut(text, offsets) for text, offsets in zip(texts, self._offsets(texts))]
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for _, chunk in self.split_texts_with_offsets([text])[0]]
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        texts = list(texts)
+        metadatas = metadatas or [{}] * len(texts)
+        if self.workers > 1 and len(texts) >= 2 * MIN_DOCS_PER_WORKER:
+            workers = min(self.workers, len(texts) // MIN_DOCS_PER_WORKER)
+            batch = -(-len(texts) // (workers * 4))
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as pool:
+                results = [chunks for part in pool.map(_split_in_worker, (texts[i:i + batch] for i in
+                                                                          range(0, len(texts), batch)))
+                           for chunks in part]
+        else:
+            results = self.split_texts_with_offsets(texts)
+
+        documents = []
+        for chunks, metadata in zip(results, metadatas):
+            for begin, chunk in chunks:
+                chunk_metadata = dict(metadata)
+                if self._add_start_index:
+                    chunk_metadata["start_index"] = begin
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
@@ -0,0 +1,283 @@
+"""
+The loader -> normalize -> chunk -> embed -> FAISS index pipeline of Personal_Chatbot.ipynb, as an importable
+module with a CLI:
+
+    python rag_index.py build              # index only the PDFs in data/ that were added, changed or removed
+    python rag_index.py build --rebuild    # start over
+    python rag_index.py status             # what `build` would do, without loading any model
+    python rag_index.py query "..." -k 5   # top chunks for a question, from the saved index (--hybrid: + BM25)
+
+The index is saved by faiss_store (index.faiss + docstore.sqlite + config.json, no pickle) and loaded
+memory-mapped. Next to it, `manifest.json` records the embedding model and chunking settings, and per PDF its
+content hash and the IDs of its chunks in the index. A changed PDF only has its own vectors deleted and
+re-added; a different model or chunking setting forces a full rebuild. A PDF that fails to parse is reported
+as "failed" and left out of the manifest, so the next `build` tries it again.
+"""
+import os
+import json
+import argparse
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from faiss_store import load_store, remove_store, save_store, store_exists
+from pdf_loader import CACHE_DIR, file_sha256, load_pdfs
+from persian_chunker import SEPARATORS, PersianTokenSplitter
+
+RAW_DIR = os.path.join(".", "data")
+INDEX_DIR = os.path.join(".", "vectorstores", "faiss_simple")
+MANIFEST_FILE = "manifest.json"
+
+MODEL_NAME = "xmanii/maux-gte-persian"
+CHUNK_SIZE = 480      # tokens; capped at the tokenizer's max length - 32 to avoid truncation
+CHUNK_OVERLAP = 72    # tokens; 15% of CHUNK_SIZE, at least 64
+
+_normalizer = None
+
+
+def normalize_fa(text: str) -> str:
+    """Normalize Persian text: hazm normalization, Arabic -> Persian letters, no tatweel/ZWJ, single spaces."""
+    global _normalizer
+    if not text:
+        return text
+    if _normalizer is None:
+        import hazm
+        _normalizer = hazm.Normalizer(persian_numbers=True, persian_style=True)
+    t = _normalizer.normalize(text)
+    t = t.replace("\ufeff", "")
+    t = t.replace("ي", "ی").replace("ك", "ک")
+    t = t.replace("ـ", "").replace("\u200d", "")
+    return " ".join(t.split())
+
+
+def normalize_docs(docs: List[Document]) -> List[Document]:
+    return [Document(page_content=normalize_fa(d.page_content), metadata=dict(d.metadata or {})) for d in docs]
+
+
+def list_pdfs(data_dir: str) -> Dict[str, str]:
+    """Return {file name: content hash} for every PDF in data_dir."""
+    return {
+        name: file_sha256(os.path.join(data_dir, name))
+        for name in sorted(os.listdir(data_dir)) if name.lower().endswith(".pdf")
+    }
+
+
+def make_text_splitter(model_name: str = MODEL_NAME, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    """Token-aware splitter: chunk lengths in the embedding model's own tokens (see persian_chunker)."""
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    max_len = getattr(tokenizer, "model_max_length", 512) or 512
+    return PersianTokenSplitter(
+        tokenizer,
+        separators=SEPARATORS,
+        chunk_size=min(chunk_size, max_len - 32),
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def make_embeddings(model_name: str = MODEL_NAME):
+    """fp32 CPUEmbeddings: same vectors as the notebook's HuggingFaceEmbeddings, length-sorted batches."""
+    from cpu_embeddings import CPUEmbeddings
+    return CPUEmbeddings(model_name, normalize=True, trust_remote_code=True)
+
+
+class RagIndex:
+    """
+    A FAISS index over the PDFs of a directory, kept in sync incrementally.
+    `embeddings` and `splitter` are created from `model_name` on first use unless given, so checking for
+    changes, or loading the saved index, never pays for what it doesn't need.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR, model_name: str = MODEL_NAME, chunk_size: int = CHUNK_SIZE,
+                 chunk_overlap: int = CHUNK_OVERLAP, embeddings=None, splitter=None, cache_dir: str = CACHE_DIR):
+        self.index_dir = index_dir
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._embeddings = embeddings
+        self._splitter = splitter
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = make_embeddings(self.model_name)
+        return self._embeddings
+
+    @property
+    def splitter(self):
+        if self._splitter is None:
+            self._splitter = make_text_splitter(self.model_name, self.chunk_size, self.chunk_overlap)
+        return self._splitter
+
+    @property
+    def settings(self) -> dict:
+        """Everything the stored vectors depend on besides the PDFs themselves."""
+        return {"embedding_model": self.model_name, "chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.index_dir, MANIFEST_FILE)
+
+    def read_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {"settings": None, "files": {}}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_manifest(self, files: Dict[str, dict]) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "files": files}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def load(self, mmap: bool = True) -> Optional[FAISS]:
+        """
+        The saved index as a LangChain FAISS vector store (None if nothing was built yet). No PDF is read and
+        nothing is unpickled; with mmap (the default) the index is mapped read-only (see faiss_store).
+        """
+        if not self.read_manifest()["files"]:
+            return None
+        return load_store(self.index_dir, self.embeddings, mmap=mmap)
+
+    def chunk_files(self, pdf_paths: List[str], hashes: Optional[Dict[str, str]] = None,
+                    errors: Optional[Dict[str, str]] = None) -> Dict[str, List[Document]]:
+        """
+        {path: chunks}, splitting the pages of all the files in one batch (pages via the extraction cache).
+        A PDF that fails to parse gets no chunks; `errors`, if given, gets {path: error} for it (see load_pdfs).
+        """
+        pages = normalize_docs(load_pdfs(pdf_paths, self.cache_dir, hashes=hashes, errors=errors))
+        chunks = {path: [] for path in pdf_paths}
+        for chunk in self.splitter.split_documents(pages):
+            chunks[chunk.metadata["source"]].append(chunk)
+        return chunks
+
+    def plan(self, data_dir: str = RAW_DIR, rebuild: bool = False) -> dict:
+        """
+        Compare data_dir with the manifest: {"added", "changed", "removed", "unchanged"} file names, plus hashes.
+        "failed" (PDFs that did not parse) is only filled by update(); they stay out of the manifest, so they
+        show up as added again and the next update retries them.
+        """
+        manifest = self.read_manifest()
+        # A missing store (e.g. one saved by FAISS.save_local) is rebuilt too
+        current_store = manifest["settings"] == self.settings and store_exists(self.index_dir)
+        indexed = manifest["files"] if current_store and not rebuild else {}
+        current = list_pdfs(data_dir)
+        return {
+            "added": [name for name in current if name not in indexed],
+            "changed": [name for name in current if name in indexed and indexed[name]["sha256"] != current[name]],
+            "removed": [name for name in indexed if name not in current],
+            "unchanged": [name for name in current if name in indexed and indexed[name]["sha256"] == current[name]],
+            "failed": [],
+            "hashes": current,
+            "indexed": indexed,
+        }
+
+    def update(self, data_dir: str = RAW_DIR, rebuild: bool = False) -> dict:
+        """Bring the index in line with data_dir, touching only the vectors of added/changed/removed PDFs."""
+        plan = self.plan(data_dir, rebuild)
+        indexed, hashes = plan["indexed"], plan["hashes"]
+        # With nothing indexed, an old store is still cleared if a rebuild was asked for or the manifest lists files
+        stale_store = not indexed and (rebuild or bool(self.read_manifest()["files"]))
+        if not (plan["added"] or plan["changed"] or plan["removed"]) and (indexed or not (hashes or stale_store)):
+            return plan
+
+        vectorstore = self.load(mmap=False) if indexed else None
+        stale_ids = [chunk_id for name in plan["changed"] + plan["removed"] for chunk_id in indexed[name]["chunk_ids"]]
+        if vectorstore is not None and stale_ids:
+            vectorstore.delete(stale_ids)
+
+        files = {name: indexed[name] for name in plan["unchanged"]}
+        chunks, chunk_ids = [], []
+        names = plan["added"] + plan["changed"]
+        paths = {os.path.join(data_dir, name): hashes[name] for name in names}
+        errors = {}
+        chunks_by_path = self.chunk_files(list(paths), paths, errors) if names else {}
+        for name in names:
+            if os.path.join(data_dir, name) in errors:
+                plan["failed"].append(name)  # left out of the manifest: retried by the next update
+                continue
+            file_chunks = chunks_by_path[os.path.join(data_dir, name)]
+            # IDs carry the content hash, so a re-added file never collides with its old vectors
+            ids = [f"{name}#{hashes[name][:12]}#{i}" for i in range(len(file_chunks))]
+            for chunk, chunk_id in zip(file_chunks, ids):
+                chunk.metadata["chunk_id"] = chunk_id
+            chunks.extend(file_chunks)
+            chunk_ids.extend(ids)
+            files[name] = {"sha256": hashes[name], "chunk_ids": ids}
+
+        if chunks:
+            if vectorstore is None:
+                vectorstore = FAISS.from_documents(chunks, self.embeddings, ids=chunk_ids)
+            else:
+                vectorstore.add_documents(chunks, ids=chunk_ids)
+        if vectorstore is not None:
+            save_store(vectorstore, self.index_dir)
+            from hybrid_retriever import BM25Index
+            BM25Index.from_vectorstore(vectorstore).save(self.index_dir)
+        else:
+            # Nothing to index (no PDFs, or none parsed): drop the old store instead of serving its chunks
+            from hybrid_retriever import BM25_MATRIX_FILE, BM25_META_FILE
+            remove_store(self.index_dir)
+            for name in (BM25_MATRIX_FILE, BM25_META_FILE):
+                if os.path.exists(os.path.join(self.index_dir, name)):
+                    os.remove(os.path.join(self.index_dir, name))
+        self.write_manifest(files)
+        return plan
+
+    def load_bm25(self):
+        """BM25 index of the saved chunks; built from the FAISS docstore if missing (indexes from before BM25)."""
+        from hybrid_retriever import BM25Index
+        bm25 = BM25Index.load(self.index_dir)
+        if bm25 is None and self.read_manifest()["files"]:
+            bm25 = BM25Index.from_vectorstore(self.load())
+            bm25.save(self.index_dir)
+        return bm25
+
+    def hybrid_retriever(self, **kwargs):
+        """BM25 + FAISS retriever fused by reciprocal rank (see hybrid_retriever)."""
+        from hybrid_retriever import HybridRetriever
+        return HybridRetriever(vectorstore=self.load(), bm25=self.load_bm25(), **kwargs)
+
+    def as_retriever(self, **kwargs):
+        """MMR retriever over the saved index, with the notebook's defaults."""
+        kwargs.setdefault("search_type", "mmr")
+        kwargs.setdefault("search_kwargs", {"k": 5, "fetch_k": 20, "lambda_mult": 0.5})
+        return self.load().as_retriever(**kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the Personal_Chatbot FAISS index")
+    parser.add_argument("--data-dir", default=RAW_DIR)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--model", default=MODEL_NAME, help="embedding model (also used for token-aware chunking)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index added/changed PDFs, drop removed ones")
+    build.add_argument("--rebuild", action="store_true", help="ignore the manifest and index everything")
+    commands.add_parser("status", help="show what `build` would change")
+    query = commands.add_parser("query", help="print the chunks retrieved for a question")
+    query.add_argument("question")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--hybrid", action="store_true", help="fuse BM25 and FAISS results")
+    args = parser.parse_args()
+
+    index = RagIndex(args.index_dir, model_name=args.model)
+    if args.command == "query":
+        if args.hybrid:
+            docs = index.hybrid_retriever(k=args.k).invoke(args.question)
+        else:
+            docs = index.load().similarity_search(normalize_fa(args.question), k=args.k)
+        for doc in docs:
+            print(doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content[:120], "...")
+        return
+
+    plan = index.update(args.data_dir, rebuild=args.rebuild) if args.command == "build" else index.plan(args.data_dir)
+    for key in ("added", "changed", "removed", "unchanged", "failed"):
+        print(f"{key:<10} {len(plan[key]):>4}  {', '.join(plan[key])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+The Tools agent, offline: a scripted fake LLM and a local stand-in for yFinance (same `history()` interface,
+a fixed latency per request), comparing the notebook's loop (tool calls one after another, no cache) with
+ToolAgent without (ttl 0: only identical calls running at the same time are shared) and with its result cache.
+
+    python benchmark_agent.py --llm-latency 0.5 --quote-latency 0.3
+    python benchmark_agent.py --trace     # per-step timings of every conversation of the cached run
+
+The conversations ask for several quotes at once, repeat some (in other letter case too), and add numbers;
+after the tool results the fake LLM answers with them, so every conversation takes two LLM calls.
+"""
+import time
+import asyncio
+import zlib
+import argparse
+import threading
+
+import pandas as pd
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from stock_tools import make_tools
+from tool_agent import ToolAgent, format_trace, trace_totals
+
+CONVERSATIONS = [
+    ("What are AMZN, GOOGL, AAPL and MSFT trading at?",
+     [("get_stock_price", {"ticker_symbol": symbol}) for symbol in ("AMZN", "GOOGL", "AAPL", "MSFT")]),
+    ("Is Amazon up today, and what is 135165 + 1233255?",
+     [("get_stock_price", {"ticker_symbol": "amzn"}), ("add-tool", {"a": 135165, "b": 1233255})]),
+    ("Compare Google, Meta and Nvidia.",
+     [("get_stock_price", {"ticker_symbol": symbol}) for symbol in ("GOOGL", "META", "NVDA")]),
+    ("Price of TSLA, and TSLA again please.",
+     [("get_stock_price", {"ticker_symbol": "TSLA"}), ("get_stock_price", {"ticker_symbol": "tsla"})]),
+]
+
+
+class LocalTicker:
+    """yf.Ticker stand-in: history() blocks for `latency` seconds and returns a deterministic close price."""
+
+    requests = 0
+    _lock = threading.Lock()
+
+    def __init__(self, symbol: str, latency: float):
+        self.symbol = symbol
+        self.latency = latency
+
+    def history(self, period: str = "1d") -> pd.DataFrame:
+        with LocalTicker._lock:
+            LocalTicker.requests += 1
+        time.sleep(self.latency)
+        return pd.DataFrame({"Close": [50 + zlib.crc32(self.symbol.encode()) % 45000 / 100]})
+
+
+class ScriptedLLM:
+    """
+    Fake tool-calling chat model: for a user question, the tool calls scripted for it; once tool results
+    follow, an answer quoting them. Every call takes `latency` seconds.
+    """
+
+    def __init__(self, script, latency: float):
+        self.script = dict(script)
+        self.latency = latency
+        self.calls = 0
+
+    def _reply(self, messages):
+        self.calls += 1
+        results = []
+        for message in reversed(messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.insert(0, message.content)
+        if results:
+            return AIMessage(" ".join(results))
+        question = next(m.content for m in reversed(messages) if isinstance(m, HumanMessage))
+        return AIMessage("", tool_calls=[{"name": name, "args": args, "id": f"call_{self.calls}_{i}"}
+                                         for i, (name, args) in enumerate(self.script[question])])
+
+    def invoke(self, messages):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def notebook_loop(llm, tools, messages, max_steps=5):
+    """The notebook's loop: each tool call in turn, blocking, nothing cached."""
+    by_name = {tool.name.lower(): tool for tool in tools}
+    for _ in range(max_steps):
+        ai_msg = llm.invoke(messages)
+        messages.append(ai_msg)
+        if not ai_msg.tool_calls:
+            break
+        for tool_call in ai_msg.tool_calls:
+            tool_output = by_name[tool_call["name"].lower()].invoke(tool_call["args"])
+            messages.append(ToolMessage(str(tool_output), tool_call_id=tool_call["id"]))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--quote-latency", type=float, default=0.3, help="seconds per stand-in quote request")
+    parser.add_argument("--ttl", type=float, default=60.0, help="tool cache TTL (s)")
+    parser.add_argument("--trace", action="store_true", help="print the per-step trace of the cached run")
+    args = parser.parse_args()
+
+    tools = make_tools(lambda symbol: LocalTicker(symbol, args.quote_latency), return_direct=False)
+    print(f"{len(CONVERSATIONS)} conversations, {sum(len(calls) for _, calls in CONVERSATIONS)} tool calls, "
+          f"LLM {args.llm_latency * 1000:.0f} ms/call, quotes {args.quote_latency * 1000:.0f} ms/request")
+    print(f"{'run':<20}{'total (s)':>10}{'LLM (s)':>9}{'tools (s)':>11}{'LLM calls':>11}{'cache hits':>12}"
+          f"{'quote requests':>16}")
+
+    answers = {}
+    LocalTicker.requests = 0
+    llm = ScriptedLLM(CONVERSATIONS, args.llm_latency)
+    start = time.perf_counter()
+    answers["notebook loop"] = [notebook_loop(llm, tools, [HumanMessage(question)])[-1].content
+                                for question, _ in CONVERSATIONS]
+    print(f"{'notebook loop':<20}{time.perf_counter() - start:>10.2f}{'':>9}{'':>11}{llm.calls:>11}{0:>12}"
+          f"{LocalTicker.requests:>16}")
+
+    for name, ttl in (("ToolAgent, ttl 0", 0.0), ("ToolAgent + cache", args.ttl)):
+        LocalTicker.requests = 0
+        agent = ToolAgent(ScriptedLLM(CONVERSATIONS, args.llm_latency), tools, ttl=ttl)
+        totals, traces, answers[name] = [], [], []
+        for question, _ in CONVERSATIONS:
+            messages, trace = agent.run([HumanMessage(question)])
+            answers[name].append(messages[-1].content)
+            totals.append(trace_totals(trace))
+            traces.append((question, trace))
+        total = {key: sum(t[key] for t in totals) for key in totals[0]}
+        print(f"{name:<20}{total['total_s']:>10.2f}{total['llm_s']:>9.2f}{total['tools_s']:>11.2f}"
+              f"{total['llm_calls']:>11}{total['cache_hits']:>12}{LocalTicker.requests:>16}")
+
+    print("same answers as the notebook loop:", all(answers[name] == answers["notebook loop"] for name in answers))
+    if args.trace:
+        for question, trace in traces:
+            print(f"\n{question}\n{format_trace(trace)}")
+
+
+if __name__ == "__main__":
+    main()
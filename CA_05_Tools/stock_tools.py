@@ -0,0 +1,51 @@
+"""
+The notebook's tools, importable: `get_stock_price` (latest close from yFinance) and `add` ("add-tool").
+
+Quotes come from `ticker_factory(symbol).history(period="1d")`, yf.Ticker by default; benchmark_agent.py
+passes a local stand-in so the agent can be run and timed offline.
+"""
+from typing import Any, Callable, List
+
+from langchain_core.tools import BaseTool, tool
+from pydantic import BaseModel, Field, field_validator
+
+
+class GetStockInput(BaseModel):
+    """Schema for stock price input."""
+    ticker_symbol: str = Field(..., description="The stock ticker symbol (e.g., 'AAPL', 'GOOGL')")
+
+    @field_validator("ticker_symbol")
+    @classmethod
+    def canonical_symbol(cls, value: str) -> str:
+        # " amzn" and "AMZN" are the same quote, and the same tool-cache entry
+        return value.strip().upper()
+
+
+class AddInput(BaseModel):
+    """Add two integers together."""
+
+    a: int = Field(..., description="First integer")
+    b: int = Field(..., description="Second integer")
+
+
+def yf_ticker(symbol: str):
+    import yfinance as yf
+    return yf.Ticker(symbol)
+
+
+def make_tools(ticker_factory: Callable[[str], Any] = yf_ticker, return_direct: bool = True) -> List[BaseTool]:
+    """[get_stock_price, add] reading quotes through `ticker_factory`."""
+
+    @tool(args_schema=GetStockInput, return_direct=return_direct,
+          description="Fetches the latest closing stock price for a given ticker symbol using yFinance.")
+    def get_stock_price(ticker_symbol: str) -> str:
+        data = ticker_factory(ticker_symbol).history(period="1d")
+        price = data["Close"].iloc[-1]
+        return f"The current price of {ticker_symbol.upper()} is ${price:.2f}"
+
+    @tool("add-tool", args_schema=AddInput, return_direct=return_direct,
+          description="Adds two integers together and returns the result.")
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    return [get_stock_price, add]
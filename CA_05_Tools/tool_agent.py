@@ -0,0 +1,193 @@
+"""
+Tool-calling loop of the Tools notebook: call the LLM, run the tool calls in its reply, feed the results back as
+ToolMessages, and repeat until it answers without tools (or every tool it called is return_direct).
+
+- The tool calls of one LLM turn are independent, so they run concurrently on the event loop: async tools
+  natively, sync ones (yFinance is blocking I/O) in worker threads, at most `max_concurrency` at a time.
+- Results are cached for `ttl` seconds, keyed by tool name + the arguments as validated by the tool's
+  args_schema (so {"ticker_symbol": "amzn"} and {"ticker_symbol": "AMZN"} share an entry). Identical calls
+  already running are awaited instead of started again. Failures are never cached; they go back to the LLM
+  as a ToolMessage with status="error", so it can correct itself.
+- Every run returns a trace: per step the LLM latency and the wall time of its tool calls, and per call its
+  latency and whether it was served from the cache. format_trace() renders it.
+"""
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Collection, Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+_MISSING = object()
+
+
+class TTLCache:
+    """ In-memory key -> value store; entries older than `ttl` seconds count as missing, oldest dropped past maxsize """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if self.clock() - entry[1] >= self.ttl:
+            del self._entries[key]
+            return default
+        return entry[0]
+
+    def put(self, key, value) -> None:
+        self._entries[key] = (value, self.clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def validate_args(tool: BaseTool, args: dict) -> dict:
+    """`args` parsed by the tool's args_schema (pydantic v2 or v1), as a plain dict."""
+    schema = tool.args_schema
+    if schema is None:
+        return dict(args)
+    if hasattr(schema, "model_validate"):
+        return schema.model_validate(args).model_dump()
+    return schema.parse_obj(args).dict()
+
+
+def _names(tool: BaseTool) -> List[str]:
+    """Names a model may use for a tool: its own, case-insensitively, with or without a "-tool" suffix."""
+    base = tool.name.lower().removesuffix("-tool")
+    return [base, base + "-tool"]
+
+
+class ToolAgent:
+    """
+    `llm`: a chat model with the tools bound (returns an AIMessage with tool_calls), e.g.
+    ChatOllama(...).bind_tools(tools). `no_cache`: names of tools whose results must never be reused.
+    """
+
+    def __init__(self, llm, tools: List[BaseTool], ttl: float = 60.0, max_steps: int = 5, max_concurrency: int = 8,
+                 no_cache: Collection[str] = (), cache: TTLCache = None):
+        self.llm = llm
+        self.tools = {name: tool for tool in tools for name in _names(tool)}
+        self.cache = cache if cache is not None else TTLCache(ttl)
+        self.no_cache = set(no_cache)
+        self.max_steps = max_steps
+        self.max_concurrency = max_concurrency
+        self._running: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def _invoke(self, tool: BaseTool, args: dict, limit: asyncio.Semaphore):
+        async with limit:
+            return await tool.ainvoke(args)
+
+    def _finished(self, key, task: asyncio.Future) -> None:
+        self._running.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.cache.put(key, task.result())
+
+    async def _call(self, tool_call: dict, limit: asyncio.Semaphore) -> Tuple[ToolMessage, dict]:
+        """Run one tool call (or take it from the cache): (ToolMessage, timing record)."""
+        record = {"name": tool_call["name"], "args": tool_call["args"], "seconds": 0.0, "cached": False,
+                  "error": None}
+        start = time.perf_counter()
+        try:
+            tool = self.tools.get(tool_call["name"].lower())
+            if tool is None:
+                raise ValueError(f"Unknown tool {tool_call['name']!r}, expected one of {sorted(self.tools)}")
+            args = validate_args(tool, tool_call["args"])
+            cacheable = tool.name not in self.no_cache
+            key = (tool.name, json.dumps(args, sort_keys=True, default=str))
+            output = self.cache.get(key, _MISSING) if cacheable else _MISSING
+            if output is not _MISSING:
+                record["cached"] = True
+            elif cacheable and key in self._running:
+                record["cached"] = True  # the same call is already running: share its result
+                output = await asyncio.shield(self._running[key])
+            else:
+                task = asyncio.ensure_future(self._invoke(tool, args, limit))
+                if cacheable:
+                    self._running[key] = task
+                    task.add_done_callback(lambda done: self._finished(key, done))
+                output = await task
+            content = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False, default=str)
+            message = ToolMessage(content, tool_call_id=tool_call["id"], name=tool.name)
+        except Exception as error:
+            record["error"] = f"{type(error).__name__}: {error}"
+            message = ToolMessage(f"Error: {record['error']}", tool_call_id=tool_call["id"], status="error")
+        record["seconds"] = time.perf_counter() - start
+        return message, record
+
+    async def arun(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], dict]:
+        """Run the loop from `messages` (not modified): (messages + the AI and tool messages, trace)."""
+        messages = list(messages)
+        limit = asyncio.Semaphore(self.max_concurrency)
+        trace = {"steps": [], "total_s": 0.0}
+        run_start = time.perf_counter()
+        for step in range(1, self.max_steps + 1):
+            start = time.perf_counter()
+            ai_msg = await self.llm.ainvoke(messages)
+            if isinstance(ai_msg, str):  # plain text LLMs (e.g. OllamaLLM) never call tools
+                ai_msg = AIMessage(ai_msg)
+            record = {"step": step, "llm_s": time.perf_counter() - start, "tools_s": 0.0, "calls": []}
+            trace["steps"].append(record)
+            messages.append(ai_msg)
+            if not ai_msg.tool_calls:
+                break
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(self._call(tool_call, limit) for tool_call in ai_msg.tool_calls))
+            record["tools_s"] = time.perf_counter() - start
+            for tool_message, call in results:
+                messages.append(tool_message)
+                record["calls"].append(call)
+            tools = [self.tools.get(call["name"].lower()) for call in record["calls"]]
+            if all(tool is not None and tool.return_direct for tool in tools) and not any(
+                    call["error"] for call in record["calls"]):
+                break
+        trace["total_s"] = time.perf_counter() - run_start
+        return messages, trace
+
+    def run(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], dict]:
+        """arun() outside an event loop (in Jupyter, `await agent.arun(messages)` instead)."""
+        return asyncio.run(self.arun(messages))
+
+
+def trace_totals(trace: dict) -> Dict[str, Any]:
+    calls = [call for step in trace["steps"] for call in step["calls"]]
+    return {
+        "total_s": trace["total_s"],
+        "llm_s": sum(step["llm_s"] for step in trace["steps"]),
+        "tools_s": sum(step["tools_s"] for step in trace["steps"]),
+        "llm_calls": len(trace["steps"]),
+        "tool_calls": len(calls),
+        "cache_hits": sum(call["cached"] for call in calls),
+        "errors": sum(call["error"] is not None for call in calls),
+    }
+
+
+def format_trace(trace: dict) -> str:
+    lines = [f"{'step':<6}{'llm (ms)':>10}{'tools (ms)':>12}  tool calls"]
+    for step in trace["steps"]:
+        lines.append(f"{step['step']:<6}{step['llm_s'] * 1000:>10.1f}{step['tools_s'] * 1000:>12.1f}"
+                     f"  {len(step['calls'])}")
+        for call in step["calls"]:
+            status = "cache hit" if call["cached"] else ""
+            if call["error"]:
+                status = "error: " + call["error"].splitlines()[0]
+            lines.append(f"{'':<28}{call['name']} {json.dumps(call['args'], ensure_ascii=False)} "
+                         f"{call['seconds'] * 1000:.1f} ms {status}".rstrip())
+    totals = trace_totals(trace)
+    lines.append(f"total {totals['total_s'] * 1000:.1f} ms: LLM {totals['llm_s'] * 1000:.1f} ms "
+                 f"({totals['llm_calls']} calls), tools {totals['tools_s'] * 1000:.1f} ms "
+                 f"({totals['tool_calls']} calls, {totals['cache_hits']} cache hits, {totals['errors']} errors)")
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+"""
+Semantic answer cache: answers to past questions, found again by embedding similarity.
+
+A new question reuses a stored answer when
+  - its embedding is within `threshold` cosine similarity of the stored question's,
+  - the stored answer is younger than `ttl` seconds, and
+  - retrieval for the new question returns the same documents the stored answer was generated from
+    (so re-ingested or newly added documents never serve an outdated answer).
+
+The "index" is one normalized float32 matrix with a row per entry: at a few thousand entries a single
+matmul is faster than any approximate structure and exact. It is bounded to `max_entries`, evicting
+expired entries first, then the least recently used.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from vector_store import normalize_rows
+
+
+def document_fingerprint(documents):
+    """ The retrieved set an answer depends on: (source, content) pairs, order-insensitive """
+    return frozenset((doc["source"], doc["content"]) for doc in documents)
+
+
+class AnswerCache:
+    def __init__(self, threshold: float = 0.95, ttl: float = 24 * 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # row -> (question, answer, fingerprint, created), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # a similar question was cached, but expired or answered from other documents
+        self._matrix = None  # (max_entries, dim); only rows in self.entries are live
+        self._free = list(range(max_entries - 1, -1, -1))  # unused rows
+        self._lock = threading.Lock()
+
+    def _scores(self, vector):
+        rows = np.fromiter(self.entries, dtype=np.int64, count=len(self.entries))
+        return rows, self._matrix[rows] @ normalize_rows(vector)[0]
+
+    def get(self, embedding, documents):
+        """ The cached answer for a question with this embedding and these retrieved documents, else None """
+        fingerprint = document_fingerprint(documents)
+        now = time.time()
+        with self._lock:
+            if self.entries:
+                rows, scores = self._scores(embedding)
+                similar = np.flatnonzero(scores >= self.threshold)
+                for position in similar[np.argsort(-scores[similar])]:
+                    row = int(rows[position])
+                    _, answer, entry_fingerprint, created = self.entries[row]
+                    if entry_fingerprint == fingerprint and now - created < self.ttl:
+                        self.entries.move_to_end(row)
+                        self.hits += 1
+                        return answer
+                if len(similar):
+                    self.stale += 1
+            self.misses += 1
+        return None
+
+    def put(self, question, embedding, answer, documents):
+        vector = normalize_rows(embedding)[0]
+        fingerprint = document_fingerprint(documents)
+        now = time.time()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            if self.entries:
+                # Concurrent misses on the same question: replace the entry instead of storing it twice
+                rows, scores = self._scores(vector)
+                for position in np.flatnonzero(scores >= self.threshold):
+                    row = int(rows[position])
+                    if self.entries[row][2] == fingerprint:
+                        del self.entries[row]
+                        self._free.append(row)
+            if not self._free:
+                for row, entry in list(self.entries.items()):
+                    if now - entry[3] >= self.ttl:
+                        del self.entries[row]
+                        self._free.append(row)
+            if not self._free:
+                self._free.append(self.entries.popitem(last=False)[0])
+            row = self._free.pop()
+            self._matrix[row] = vector
+            self.entries[row] = (question, answer, fingerprint, now)
+
+    def invalidate(self):
+        """ Forget every answer, e.g. after the document collection changed """
+        with self._lock:
+            self.entries.clear()
+            self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.entries),
+        }
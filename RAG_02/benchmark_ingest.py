@@ -0,0 +1,84 @@
+"""
+Ingestion throughput (docs/sec) against a local fake embedding + vector-store server.
+
+    python benchmark_ingest.py --docs 5000 --latency 0.05
+
+Compares the batched, concurrent ingest_documents() with the old one-request-per-document loop,
+then re-ingests the same documents, which should be served entirely by the embedding cache.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from fake_services import FakeServices
+
+TOPICS = ["diabetes", "hypertension", "asthma", "influenza", "arthritis", "stroke", "hepatitis", "obesity"]
+
+
+def synthetic_docs(count, start=0):
+    return [
+        {
+            "content": f"Document {i} about {TOPICS[i % len(TOPICS)]}: " + "clinical notes and guidance " * (5 + i % 20),
+            "source": f"Synthetic {i}",
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def ingest_one_by_one(app, documents):
+    """ The previous ingestion loop: one embedding call and one insert per document """
+    for doc in documents:
+        embedding = app.encode_text(doc['content'])
+        app.get_client().data_object.create(
+            data_object={"content": doc['content'], "source": doc['source']},
+            class_name="Document",
+            vector=embedding
+        )
+
+
+def timed(function, documents):
+    start = time.perf_counter()
+    function(documents)
+    return len(documents) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=5000, help="documents for the batched run")
+    parser.add_argument("--baseline-docs", type=int, default=200, help="documents for the one-by-one run")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round trip per request (s)")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimension")
+    parser.add_argument("--batch-tokens", type=int, help="override EMBEDDING_BATCH_TOKENS")
+    args = parser.parse_args()
+
+    with FakeServices(latency=args.latency, dim=args.dim) as services, tempfile.TemporaryDirectory() as tmp:
+        # Point the app at the fake server (and a fresh embedding cache) before it is imported
+        os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(tmp, "embedding_cache.sqlite")
+        os.environ["OPENAI_API_KEY"] = "fake-key"
+        os.environ["OPENAI_API_BASE"] = services.url + "/v1"
+        os.environ["WEAVIATE_URL"] = services.url
+        import healthcare_app_RAG as app
+        app.openai.api_base = services.url + "/v1"
+        if args.batch_tokens:
+            app.EMBEDDING_BATCH_TOKENS = args.batch_tokens
+
+        baseline = timed(lambda docs: ingest_one_by_one(app, docs), synthetic_docs(args.baseline_docs, start=args.docs))
+        services.stats.clear()
+        batched = timed(app.ingest_documents, synthetic_docs(args.docs))
+        batched_stats = dict(services.stats)
+        services.stats.clear()
+        reingest = timed(app.ingest_documents, synthetic_docs(args.docs))
+
+        print(f"latency per request: {args.latency * 1000:.0f} ms, embedding dim: {args.dim}")
+        print(f"{'mode':<14}{'docs':>8}{'docs/sec':>12}")
+        print(f"{'one-by-one':<14}{args.baseline_docs:>8}{baseline:>12.1f}")
+        print(f"{'batched':<14}{args.docs:>8}{batched:>12.1f}")
+        print(f"{'re-ingest':<14}{args.docs:>8}{reingest:>12.1f}")
+        print(f"speedup: {batched / baseline:.1f}x")
+        print(f"batched run requests: {batched_stats}")
+        print(f"re-ingest requests: {services.stats} (embedding cache: {app.get_embedding_cache().stats()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Time-to-first-token and requests/sec of the streaming HTTP server (`healthcare_app_RAG.py serve`) against a
+local mock embeddings + LLM server, compared with the blocking one-question-at-a-time path.
+
+    python benchmark_serving.py --requests 200 --concurrency 32 --latency 0.05 --token-delay 0.01
+
+The blocking path shows nothing until the whole completion is back, so its time to first token is its
+full latency. Retrieval uses the in-process NumPy vector store over the sample documents.
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+import aiohttp
+from aiohttp import web
+
+from fake_services import FakeServices
+
+TOPICS = ["diabetes", "hypertension", "asthma", "influenza", "arthritis", "stroke", "hepatitis", "obesity"]
+
+
+def questions(count, start=0, distinct=None):
+    # Each of the `distinct` questions pays for its own query embedding and answer; repeats hit the caches
+    distinct = distinct or count
+    return [f"Question {start + i % distinct}: what are the symptoms of {TOPICS[i % distinct % len(TOPICS)]}?"
+            for i in range(count)]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_blocking(app, batch):
+    """ The `ask` path: retrieve, then one blocking completion per question, one question at a time """
+    first_tokens = []
+    start = time.perf_counter()
+    for question in batch:
+        asked = time.perf_counter()
+        app.generate_answer(question, app.build_context(app.retrieve_documents(question)))
+        first_tokens.append(time.perf_counter() - asked)
+    return first_tokens, len(batch) / (time.perf_counter() - start)
+
+
+async def run_streaming(app, batch, concurrency):
+    runner = web.AppRunner(app.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    url = f"http://{host}:{port}/ask"
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(session, question):
+        async with limit:
+            asked = time.perf_counter()
+            first_token = None
+            async with session.post(url, json={"question": question}) as response:
+                response.raise_for_status()
+                async for _ in response.content.iter_any():
+                    if first_token is None:
+                        first_token = time.perf_counter() - asked
+            return first_token
+
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+            start = time.perf_counter()
+            first_tokens = await asyncio.gather(*(one(session, question) for question in batch))
+            return first_tokens, len(batch) / (time.perf_counter() - start)
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="questions sent to the streaming server")
+    parser.add_argument("--baseline-requests", type=int, default=10, help="questions for the blocking path")
+    parser.add_argument("--distinct", type=int, help="distinct questions among --requests (default: all)")
+    parser.add_argument("--concurrency", type=int, default=32, help="questions in flight at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round trip per request (s)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="simulated time per generated token (s)")
+    parser.add_argument("--tokens", type=int, default=50, help="tokens per generated answer")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimension")
+    args = parser.parse_args()
+
+    with FakeServices(latency=args.latency, dim=args.dim, token_delay=args.token_delay,
+                      completion_tokens=args.tokens) as services, tempfile.TemporaryDirectory() as tmp:
+        # Point the app at the fake server, a fresh embedding cache and a local vector store before import
+        os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(tmp, "embedding_cache.sqlite")
+        os.environ["VECTOR_STORE"] = "numpy"
+        os.environ["VECTOR_STORE_PATH"] = os.path.join(tmp, "vector_store")
+        os.environ["OPENAI_API_KEY"] = "fake-key"
+        os.environ["OPENAI_API_BASE"] = services.url + "/v1"
+        import healthcare_app_RAG as app
+        app.openai.api_base = services.url + "/v1"
+        app.ingest_documents(app.healthcare_docs)
+
+        blocking = run_blocking(app, questions(args.baseline_requests, start=args.requests))
+        services.stats.clear()
+        streaming = asyncio.run(run_streaming(app, questions(args.requests, distinct=args.distinct), args.concurrency))
+
+        print(f"latency per request: {args.latency * 1000:.0f} ms, {args.tokens} tokens at "
+              f"{args.token_delay * 1000:.0f} ms each")
+        print(f"{'mode':<12}{'requests':>10}{'in flight':>11}{'TTFT p50 (s)':>14}{'TTFT p99 (s)':>14}{'req/s':>9}")
+        for name, count, concurrency, (first_tokens, throughput) in (
+                ("blocking", args.baseline_requests, 1, blocking),
+                ("streaming", args.requests, args.concurrency, streaming)):
+            print(f"{name:<12}{count:>10}{concurrency:>11}{statistics.median(first_tokens):>14.3f}"
+                  f"{percentile(first_tokens, 0.99):>14.3f}{throughput:>9.1f}")
+        print(f"streaming run requests: {services.stats}")
+        print(f"answer cache: {app.get_answer_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Startup cost of healthcare_app_RAG: import time and first-query latency, each measured in a fresh process
+against the local fake embedding + vector-store server.
+
+    python benchmark_startup.py
+    git show 0fafe8d:RAG_02/healthcare_app_RAG.py > /tmp/healthcare_app_RAG_old.py
+    python benchmark_startup.py --compare /tmp/healthcare_app_RAG_old.py
+
+With --compare the same measurements are taken for an older copy of the module (e.g. the one that
+ingested the sample documents at import time) so the two can be read side by side.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from fake_services import FakeServices
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child process: import the module from a file path, then answer one query
+CHILD = r"""
+import os, sys, json, time, importlib.util
+import weaviate
+
+# Older copies hard-code their Weaviate URL; point every client at the fake server instead
+_Client = weaviate.Client
+weaviate.Client = lambda url, *args, **kwargs: _Client(os.environ["WEAVIATE_URL"], *args, **kwargs)
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("healthcare_app_RAG", sys.argv[1])
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+imported = time.perf_counter()
+app.retrieve_documents("What are the symptoms of asthma?", top_k=3)
+queried = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_query": queried - imported}))
+"""
+
+
+def measure(module_path, env, runs, cache_prefix):
+    samples = []
+    for run in range(runs):
+        # A fresh embedding cache per run, so every first query pays for its embedding
+        run_env = dict(env, EMBEDDING_CACHE_PATH=f"{cache_prefix}_{run}_cache.sqlite")
+        output = subprocess.run([sys.executable, "-c", CHILD, module_path], env=run_env, cwd=HERE,
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default=os.path.join(HERE, "healthcare_app_RAG.py"))
+    parser.add_argument("--compare", help="older copy of healthcare_app_RAG.py to measure as well")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per module, the median is reported")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round trip per request (s)")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimension")
+    args = parser.parse_args()
+
+    with FakeServices(latency=args.latency, dim=args.dim) as services, tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   OPENAI_API_KEY="fake-key",
+                   OPENAI_API_BASE=services.url + "/v1",
+                   WEAVIATE_URL=services.url,
+                   EMBEDDING_CACHE_PATH=os.path.join(tmp, "embedding_cache.sqlite"))
+        # The current module ingests explicitly; do it once up front so the store is populated
+        subprocess.run([sys.executable, args.module, "ingest"], env=env, cwd=HERE, check=True, capture_output=True)
+
+        modules = [("current", args.module)] + ([("compare", args.compare)] if args.compare else [])
+        print(f"latency per request: {args.latency * 1000:.0f} ms, runs: {args.runs}")
+        print(f"{'module':<10}{'import (s)':>12}{'first query (s)':>17}{'objects after':>15}")
+        for name, path in modules:
+            timings = measure(os.path.abspath(path), env, args.runs, os.path.join(tmp, name))
+            print(f"{name:<10}{timings['import']:>12.3f}{timings['first_query']:>17.3f}{len(services.objects):>15}")
+
+
+if __name__ == "__main__":
+    main()
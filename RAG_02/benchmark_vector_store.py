@@ -0,0 +1,80 @@
+"""
+Query latency (p50/p99) and recall@k of the in-process vector stores, against exact brute force.
+
+    python benchmark_vector_store.py --sizes 10000,100000,1000000 --dim 128
+
+Vectors are synthetic and clustered (like real embeddings, unlike uniform noise), so the approximate
+FAISS indexes face a realistic neighbourhood structure. 1M x 1536-dim float32 is ~6 GB, hence the
+smaller default dimension; pass --dim 1536 to match text-embedding-ada-002 on a large machine.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from vector_store import NumpyVectorStore, FaissVectorStore, faiss
+
+
+def clustered_vectors(count, dim, rng, centers):
+    labels = rng.integers(len(centers), size=count)
+    return (centers[labels] + 0.35 * rng.standard_normal((count, dim))).astype(np.float32)
+
+
+def build_store(store, vectors):
+    ids = [str(i) for i in range(len(vectors))]
+    store.upsert(ids, vectors, [{"id": object_id} for object_id in ids])
+    return store
+
+
+def exact_neighbours(store, queries, top_k, batch=256):
+    return np.vstack([store.search_rows(queries[start:start + batch], top_k)[1]
+                      for start in range(0, len(queries), batch)])
+
+
+def measure(store, queries, truth, top_k):
+    """ (p50 ms, p99 ms, recall@k) over single-vector queries, the way retrieve_documents issues them """
+    latencies, found = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, rows = store.search_rows(query[None, :], top_k)
+        latencies.append(time.perf_counter() - start)
+        found += len(np.intersect1d(rows[0], expected))
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return p50, p99, found / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((1000, args.dim))
+    queries = clustered_vectors(args.queries, args.dim, rng, centers)
+    print(f"dim: {args.dim}, queries: {args.queries}, k: {args.top_k}")
+    print(f"{'vectors':>9}  {'backend':<12}{'build (s)':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'recall@k':>10}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        vectors = clustered_vectors(size, args.dim, rng, centers)
+        exact = build_store(NumpyVectorStore(), vectors)
+        truth = exact_neighbours(exact, queries, args.top_k)
+
+        backends = [("numpy", lambda: build_store(NumpyVectorStore(), vectors))]
+        if faiss is not None:
+            backends += [(f"faiss-{index_type}", lambda index_type=index_type: build_store(
+                FaissVectorStore(index_type=index_type), vectors)) for index_type in ("hnsw", "ivf")]
+        for name, build in backends:
+            start = time.perf_counter()
+            store = build()
+            if isinstance(store, FaissVectorStore):
+                store.build_index()
+            build_time = time.perf_counter() - start
+            p50, p99, recall = measure(store, queries, truth, args.top_k)
+            print(f"{size:>9}  {name:<12}{build_time:>10.2f}{p50:>10.3f}{p99:>10.3f}{recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
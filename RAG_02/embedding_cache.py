@@ -0,0 +1,94 @@
+"""
+Content-addressed embedding cache: an LRU dict in memory in front of a SQLite file on disk.
+
+Keys are sha256(model name + normalized text), values float32 vectors, so the same text embedded
+with the same model is only ever sent to the embedding API once - across ingestion runs and queries.
+"""
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+SQL_BATCH = 500  # keys per SELECT ... IN (...), below SQLite's host-parameter limit
+
+
+def normalize_text(text: str) -> str:
+    """ Collapse all whitespace runs (newlines included) to single spaces """
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, memory_size: int = 10000):
+        self.memory_size = memory_size
+        # key -> array("f") vector, least recently used first: 4 bytes per float, where a list of Python
+        # floats takes ~32; vectors become lists only when they are returned
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get_many(self, model: str, texts):
+        """ Cached vectors for `texts`, None where the text has not been embedded yet """
+        keys = [cache_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                else:
+                    missing.append(key)
+            for start in range(0, len(missing), SQL_BATCH):
+                chunk = missing[start:start + SQL_BATCH]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    found[key] = array("f", blob)
+                    self._remember(key, found[key])
+            vectors = [found[key].tolist() if key in found else None for key in keys]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def get(self, model: str, text: str):
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts, vectors):
+        keys = [cache_key(model, text) for text in texts]
+        vectors = [array("f", vector) for vector in vectors]  # float32, same as what a disk hit returns
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                     [(key, vector.tobytes()) for key, vector in zip(keys, vectors)])
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+
+    def put(self, model: str, text: str, vector):
+        self.put_many(model, [text], [vector])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "in_memory": len(self.memory),
+        }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,187 @@
+"""
+Local stand-ins for the OpenAI embeddings and completions APIs and the Weaviate REST/GraphQL API, used by
+the benchmarks so they measure this app's pipeline (batching, concurrency, round trips) without the network.
+
+Embeddings are deterministic: the same text always maps to the same unit vector.
+Every request sleeps for `latency` seconds to simulate the network round trip; completions then produce
+`completion_tokens` tokens, one every `token_delay` seconds, streamed as server-sent events if asked to.
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def fake_embedding(text: str, dim: int):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse pooled connections
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_events(self, events, delay):
+        """ OpenAI-style stream: one `data: {json}` event per item, then `data: [DONE]` """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            time.sleep(delay)
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        services = self.server.services
+        path = urlsplit(self.path).path
+        time.sleep(services.latency)
+        if path == "/v1/.well-known/ready":
+            self._send_json({})
+        elif path == "/v1/meta":
+            self._send_json({"hostname": "http://fake", "version": "1.23.0", "modules": {}})
+        elif path == "/v1/schema":
+            self._send_json({"classes": []})
+        elif path == "/v1/nodes":  # polled by the batch client while it inserts
+            self._send_json({"nodes": [{
+                "name": "fake", "status": "HEALTHY", "version": "1.23.0", "shards": [],
+                "stats": {"objectCount": len(services.objects), "shardCount": 1},
+                "batchStats": {"queueLength": 0, "ratePerSecond": 0},
+            }]})
+        else:
+            self._send_json({"error": {"message": f"not found: {path}"}}, status=404)
+
+    def do_POST(self):
+        services = self.server.services
+        path = urlsplit(self.path).path
+        payload = self._read_json()
+        time.sleep(services.latency)
+        if path.endswith("/embeddings"):  # /v1/embeddings or /v1/engines/<engine>/embeddings
+            inputs = payload["input"]
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            services.count("embedding_requests")
+            services.count("embedded_texts", len(inputs))
+            data = [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(text, services.dim)}
+                for i, text in enumerate(inputs)
+            ]
+            self._send_json({"object": "list", "data": data, "model": payload.get("model"),
+                             "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+        elif path.endswith("/completions"):
+            services.count("completion_requests")
+            tokens = [f" token{i}" for i in range(min(payload.get("max_tokens") or 16, services.completion_tokens))]
+            if payload.get("stream"):
+                self._send_events(({"object": "text_completion", "model": payload.get("model"),
+                                    "choices": [{"text": token, "index": 0, "finish_reason": None}]}
+                                   for token in tokens), services.token_delay)
+            else:
+                time.sleep(services.token_delay * len(tokens))
+                self._send_json({"object": "text_completion", "model": payload.get("model"),
+                                 "choices": [{"text": "".join(tokens), "index": 0, "finish_reason": "length"}],
+                                 "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens)}})
+        elif path == "/v1/batch/objects":
+            services.count("insert_requests")
+            results = [dict(obj, id=services.store(obj), result={}) for obj in payload.get("objects", [])]
+            self._send_json(results)
+        elif path == "/v1/objects":
+            services.count("insert_requests")
+            self._send_json(dict(payload, id=services.store(payload)))
+        elif path == "/v1/graphql":
+            services.count("query_requests")
+            self._send_json(services.near_vector_query(payload["query"]))
+        else:
+            self._send_json({"error": {"message": f"not found: {path}"}}, status=404)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # clients exiting with keep-alive sockets open
+            super().handle_error(request, client_address)
+
+
+class FakeServices:
+    """ One HTTP server answering both the OpenAI and the Weaviate endpoints """
+
+    def __init__(self, latency: float = 0.05, dim: int = 1536, token_delay: float = 0.01, completion_tokens: int = 50):
+        self.latency = latency
+        self.dim = dim
+        self.token_delay = token_delay
+        self.completion_tokens = completion_tokens
+        self.objects = {}  # Weaviate id -> object, upserted like the real batch endpoint
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + amount
+
+    def store(self, obj):
+        object_id = obj.get("id") or str(uuid.uuid4())
+        with self._lock:
+            self.objects[object_id] = obj
+        return object_id
+
+    def near_vector_query(self, query):
+        """ Brute-force answer to the `Get{Class(nearVector: ... limit: n){fields}}` query the client builds """
+        class_name = re.search(r"Get\s*\{\s*(\w+)", query).group(1)
+        fields = re.search(r"\)\s*\{([^}]*)\}", query).group(1).split()
+        limit = re.search(r"limit:\s*(\d+)", query)
+        limit = int(limit.group(1)) if limit else 10
+        vector = [float(v) for v in re.search(r"vector:\s*\[([^\]]*)\]", query).group(1).split(",")]
+        with self._lock:
+            candidates = [obj for obj in self.objects.values() if obj.get("class") == class_name and obj.get("vector")]
+        candidates.sort(key=lambda obj: -sum(a * b for a, b in zip(obj["vector"], vector)))
+        hits = [{field: obj.get("properties", {}).get(field) for field in fields} for obj in candidates[:limit]]
+        return {"data": {"Get": {class_name: hits}}}
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.services = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
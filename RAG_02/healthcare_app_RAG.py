@@ -1,16 +1,44 @@
+import os
+import re
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import aiohttp
 import openai
 import weaviate
 import json
-from openai.embeddings_utils import get_embedding
-from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from aiohttp import web
 import tiktoken
+from embedding_cache import EmbeddingCache, normalize_text
+from answer_cache import AnswerCache
+from vector_store import VECTOR_STORES, WeaviateVectorStore
 
 # Configuration
-OPENAI_API_KEY = 'your-openai-api-key'
-WEAVIATE_URL = 'https://your-weaviate-instance.com'
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', 'your-openai-api-key')
+WEAVIATE_URL = os.environ.get('WEAVIATE_URL', 'https://your-weaviate-instance.com')
+EMBEDDING_CACHE_PATH = os.environ.get('EMBEDDING_CACHE_PATH', 'embedding_cache.sqlite')
+VECTOR_STORE = os.environ.get('VECTOR_STORE', 'weaviate')  # weaviate | numpy | faiss
+VECTOR_STORE_PATH = os.environ.get('VECTOR_STORE_PATH', 'vector_store')  # directory of the in-process stores
 
-# Initialize Weaviate Client
-client = weaviate.Client(WEAVIATE_URL)
+# Namespace for deterministic Weaviate object IDs (re-ingesting a source overwrites its object)
+DOCUMENT_ID_NAMESPACE = uuid.UUID('6f0f5c2e-3d4b-4a8e-9d7c-1c2b3a4d5e6f')
+
+# Clients are created on first use, so importing this module has no side effects
+_client = None
+_encodings = {}  # model name -> tiktoken encoding
+_embedding_cache = None
+_vector_store = None
+_answer_cache = None
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = weaviate.Client(WEAVIATE_URL)
+    return _client
 
 # Initialize OpenAI Client
 openai.api_key = OPENAI_API_KEY
@@ -20,40 +48,131 @@ MAX_TOKENS = 1500
 EMBEDDING_MODEL = 'text-embedding-ada-002'  # OpenAI's embedding model
 LLM_MODEL = 'gpt-4'  # OpenAI's language generation model
 CHUNK_SIZE = 1000  # Maximum token size per document chunk
+CONTEXT_TOKEN_BUDGET = 3000  # Tokens of retrieved context per prompt (gpt-4: 8k window, MAX_TOKENS kept for the answer)
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Word-trigram Jaccard similarity above which a passage repeats one already used
+MIN_PASSAGE_TOKENS = 50  # Don't bother truncating a passage into less room than this
+
+SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
+
+# Ingestion batching
+EMBEDDING_BATCH_TOKENS = 100000  # Token cap for one embeddings request (sum over its inputs)
+EMBEDDING_BATCH_SIZE = 2048  # Max inputs per embeddings request (OpenAI limit)
+MAX_CONCURRENT_REQUESTS = 8  # Embedding requests in flight at once
+MAX_RETRIES = 5  # Attempts per embedding request before giving up
+RETRY_BASE_DELAY = 0.5  # Seconds, doubled on every retry
+WEAVIATE_BATCH_SIZE = 100  # Objects per Weaviate batch insert
+EMBEDDING_CACHE_MEMORY_SIZE = 10000  # Vectors kept in the in-memory LRU layer
+
+# Answer cache: a question close enough to an earlier one, retrieving the same documents, reuses its answer
+ANSWER_CACHE_THRESHOLD = 0.95  # Cosine similarity between question embeddings
+ANSWER_CACHE_TTL = 24 * 3600  # Seconds an answer stays valid
+ANSWER_CACHE_SIZE = 1000  # Answers kept, least recently used evicted first
+
+# Serving
+HTTP_POOL_SIZE = 100  # Pooled connections to the OpenAI API, shared by all in-flight questions
+
+# Errors worth retrying: throttling, timeouts and server-side failures
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.Timeout,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+)
+
+# Prompt budgets count in the generation model's tokens, embedding request caps in the embedding model's
+def get_encoding(model=LLM_MODEL):
+    if model not in _encodings:
+        _encodings[model] = tiktoken.encoding_for_model(model)
+    return _encodings[model]
+
+# Embeddings are cached on disk by hash of (model, normalized text), shared by ingestion and queries
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, memory_size=EMBEDDING_CACHE_MEMORY_SIZE)
+    return _embedding_cache
+
+# Where documents are stored and searched: remote Weaviate, or an index inside this process
+def get_vector_store():
+    global _vector_store
+    if _vector_store is None:
+        if VECTOR_STORE == 'weaviate':
+            _vector_store = WeaviateVectorStore(get_client, class_name="Document", properties=("content", "source"),
+                                                batch_size=WEAVIATE_BATCH_SIZE, timeout_retries=MAX_RETRIES)
+        elif VECTOR_STORE in VECTOR_STORES:
+            _vector_store = VECTOR_STORES[VECTOR_STORE](VECTOR_STORE_PATH)
+        else:
+            raise ValueError(f"unknown VECTOR_STORE: {VECTOR_STORE} (expected one of {', '.join(VECTOR_STORES)})")
+    return _vector_store
+
+def get_answer_cache():
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache(ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_SIZE)
+    return _answer_cache
 
 # Function to encode text into embeddings
 def encode_text(text: str):
-    return get_embedding(text, model=EMBEDDING_MODEL)
+    embedding_cache = get_embedding_cache()
+    embedding = embedding_cache.get(EMBEDDING_MODEL, text)
+    if embedding is None:
+        embedding = embed_batch([text])[0]
+        embedding_cache.put(EMBEDDING_MODEL, text, embedding)
+    return embedding
+
+# Perform similarity search and return the relevant documents, most similar first
+def search_documents(query_embedding, top_k=10):
+    return [
+        {"content": doc["content"], "source": doc["source"]}
+        for doc in get_vector_store().search(query_embedding, top_k)
+    ]
 
-# Function to retrieve similar documents from Weaviate
+# Function to retrieve similar documents from the vector store
 def retrieve_documents(query: str, top_k=10):
-    query_embedding = encode_text(query)
-    
-    # Perform similarity search in Weaviate
-    result = client.query.get("Document", ["content", "source"])\
-        .with_near_vector({"vector": query_embedding})\
-        .with_limit(top_k)\
-        .do()
-
-    # Extract and return relevant documents
-    documents = []
-    for doc in result["data"]["Get"]["Document"]:
-        documents.append({
-            "content": doc["content"],
-            "source": doc["source"]
-        })
-    return documents
-
-# Function to concatenate the retrieved document content
-def build_context(documents):
-    context = ""
+    return search_documents(encode_text(query), top_k)
+
+# Cut text to at most max_tokens, ending on a sentence boundary ("" if the first sentence doesn't fit)
+def truncate_to_tokens(text: str, max_tokens: int):
+    tokens = get_encoding().encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    head = get_encoding().decode(tokens[:max_tokens])
+    end = 0
+    for match in SENTENCE_END.finditer(head):
+        end = match.end()
+    return head[:end]
+
+def _shingles(text: str):
+    words = normalize_text(text).lower().split()
+    return {tuple(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+# Function to assemble the retrieved documents (most relevant first) into a token-budgeted context
+def build_context(documents, max_tokens=None):
+    max_tokens = max_tokens or CONTEXT_TOKEN_BUDGET
+    passages, seen, used = [], [], 0
     for doc in documents:
-        context += f"Source: {doc['source']}\nContent: {doc['content']}\n\n"
-    return context
+        shingles = _shingles(doc['content'])
+        if any(len(shingles & other) / len(shingles | other) >= NEAR_DUPLICATE_THRESHOLD for other in seen):
+            continue
+        header = f"Source: {doc['source']}\nContent: "
+        header_tokens = len(get_encoding().encode(header)) + 1  # + the blank line after the passage
+        room = min(max_tokens - used - header_tokens, CHUNK_SIZE)
+        if room < MIN_PASSAGE_TOKENS:
+            break
+        content, content_tokens = doc['content'], len(get_encoding().encode(doc['content']))
+        if content_tokens > room:
+            content = truncate_to_tokens(content, room)
+            if not content:
+                continue
+            content_tokens = len(get_encoding().encode(content))
+        passages.append(f"{header}{content}\n\n")
+        seen.append(shingles)
+        used += header_tokens + content_tokens
+    return "".join(passages)
 
-# Function to generate answer using OpenAI GPT-4
-def generate_answer(question: str, context: str):
-    prompt = f"""
+def build_prompt(question: str, context: str):
+    return f"""
     You are a helpful healthcare assistant. Answer the following question based on the provided context. 
     If the context doesn't contain enough information, state "I do not know."
 
@@ -65,30 +184,95 @@ def generate_answer(question: str, context: str):
 
     Answer:
     """
-    
+
+# Function to generate answer using OpenAI GPT-4; with stream=True, yields the text as it is generated
+def generate_answer(question: str, context: str, stream=False):
     response = openai.Completion.create(
         model=LLM_MODEL,
-        prompt=prompt,
+        prompt=build_prompt(question, context),
         max_tokens=MAX_TOKENS,
-        temperature=0.5
+        temperature=0.5,
+        stream=stream
     )
+    if stream:
+        return (chunk.choices[0].text for chunk in response)
     
     return response.choices[0].text.strip()
 
-# Ingest and store documents into Weaviate
+# Split texts into embedding requests capped by token count and number of inputs
+def batch_by_tokens(texts, max_tokens=None, max_items=None):
+    max_tokens = max_tokens or EMBEDDING_BATCH_TOKENS
+    max_items = max_items or EMBEDDING_BATCH_SIZE
+    batch, batch_tokens = [], 0
+    for index, text in enumerate(texts):
+        tokens = len(get_encoding(EMBEDDING_MODEL).encode(text))
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) == max_items):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(index)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+# Embed several texts in one request, retrying with exponential backoff and jitter
+def embed_batch(texts):
+    texts = [normalize_text(text) for text in texts]  # the exact text the cache key is built from
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = openai.Embedding.create(input=texts, model=EMBEDDING_MODEL)
+            return [item["embedding"] for item in sorted(response["data"], key=lambda item: item["index"])]
+        except RETRYABLE_ERRORS:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(RETRY_BASE_DELAY * 2 ** attempt * (1 + random.random()))
+
+# Deterministic object ID: a source is stored once, however many times it is ingested
+def document_id(doc):
+    return str(uuid.uuid5(DOCUMENT_ID_NAMESPACE, doc['source']))
+
+# Ingest and store (upsert) documents into the vector store
 def ingest_documents(documents):
-    for doc in documents:
-        content = doc['content']
-        source = doc['source']
-        embedding = encode_text(content)
-        
-        # Insert document into Weaviate
-        client.data_object.create(
-            data_object={"content": content, "source": source},
-            class_name="Document",
-            vector=embedding
+    vector_store = get_vector_store()
+    embedding_cache = get_embedding_cache()
+    documents = list(documents)
+    contents = [doc['content'] for doc in documents]
+    cached = embedding_cache.get_many(EMBEDDING_MODEL, contents)
+    missing = [index for index, embedding in enumerate(cached) if embedding is None]
+
+    def add(indices, embeddings):
+        vector_store.upsert(
+            [document_id(documents[index]) for index in indices],
+            embeddings,
+            [{"content": documents[index]['content'], "source": documents[index]['source']} for index in indices]
         )
 
+    with ThreadPoolExecutor(MAX_CONCURRENT_REQUESTS) as pool:
+        pending = {}  # future -> indices of the documents it embeds
+
+        def store(done):
+            for future in done:
+                indices, embeddings = pending.pop(future), future.result()
+                embedding_cache.put_many(EMBEDDING_MODEL, [contents[index] for index in indices], embeddings)
+                add(indices, embeddings)
+
+        hits = [index for index, embedding in enumerate(cached) if embedding is not None]
+        if hits:
+            add(hits, [cached[index] for index in hits])
+
+        # Only the documents missing from the cache go to the embedding API
+        for batch in batch_by_tokens([contents[index] for index in missing]):
+            indices = [missing[position] for position in batch]
+            # Backpressure: never more than MAX_CONCURRENT_REQUESTS embedding calls in flight
+            if len(pending) >= MAX_CONCURRENT_REQUESTS:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                store(done)
+            future = pool.submit(embed_batch, [contents[index] for index in indices])
+            pending[future] = indices
+        store(wait(pending).done)
+    vector_store.save()
+    if _answer_cache is not None:
+        _answer_cache.invalidate()
+
 # Sample healthcare documents for ingestion
 healthcare_docs = [
     {"content": "Diabetes is a chronic disease where the body is unable to regulate blood sugar levels.", "source": "Diabetes Overview"},
@@ -123,31 +307,141 @@ healthcare_docs = [
 ]
 
 
-# Ingest documents
-ingest_documents(healthcare_docs)
-
-# Main function to handle user query and provide RAG-based answer
-def main():
+# Answer one question with RAG
+def ask(user_query=None):
     print("Welcome to the Healthcare Query System powered by Retrieval-Augmented Generation (RAG).")
     
     # Get user query
-    user_query = input("Please enter your healthcare-related question: ")
+    if not user_query:
+        user_query = input("Please enter your healthcare-related question: ")
 
     # Retrieve top documents based on the query
-    documents = retrieve_documents(user_query)
+    query_embedding = encode_text(user_query)
+    documents = search_documents(query_embedding)
 
     if not documents:
         print("Sorry, no relevant documents found.")
         return
 
+    print("\nGenerated Answer:")
+    answer_cache = get_answer_cache()
+    answer = answer_cache.get(query_embedding, documents)
+    if answer is not None:
+        print(answer)
+        return
+
     # Build context for the LLM
     context = build_context(documents)
     
-    # Generate answer from the LLM using retrieved context
-    answer = generate_answer(user_query, context)
+    # Generate answer from the LLM using retrieved context, printing it as it arrives
+    pieces = []
+    for text in generate_answer(user_query, context, stream=True):
+        print(text, end="", flush=True)
+        pieces.append(text)
+    print()
+    answer_cache.put(user_query, query_embedding, "".join(pieces).strip(), documents)
 
-    print("\nGenerated Answer:")
-    print(answer)
+# Async counterparts of the functions above, for serving many questions on one event loop
+async def aembed_batch(texts):
+    texts = [normalize_text(text) for text in texts]
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = await openai.Embedding.acreate(input=texts, model=EMBEDDING_MODEL)
+            return [item["embedding"] for item in sorted(response["data"], key=lambda item: item["index"])]
+        except RETRYABLE_ERRORS:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt * (1 + random.random()))
+
+async def aencode_text(text: str):
+    # The cache is SQLite behind a lock: read and write it in a worker thread, not on the event loop
+    embedding_cache = get_embedding_cache()
+    embedding = await asyncio.to_thread(embedding_cache.get, EMBEDDING_MODEL, text)
+    if embedding is None:
+        embedding = (await aembed_batch([text]))[0]
+        await asyncio.to_thread(embedding_cache.put, EMBEDDING_MODEL, text, embedding)
+    return embedding
+
+async def asearch_documents(query_embedding, top_k=10):
+    # Vector store clients are synchronous: search in a worker thread so other questions keep streaming
+    return await asyncio.to_thread(search_documents, query_embedding, top_k)
+
+async def agenerate_answer(question: str, context: str):
+    response = await openai.Completion.acreate(
+        model=LLM_MODEL,
+        prompt=build_prompt(question, context),
+        max_tokens=MAX_TOKENS,
+        temperature=0.5,
+        stream=True
+    )
+    async for chunk in response:
+        yield chunk.choices[0].text
+
+# POST /ask {"question": ..., "top_k": 10} -> the answer as a chunked text/plain stream
+async def handle_ask(request):
+    openai.aiosession.set(request.app["http_session"])
+    payload = await request.json()
+    question = payload.get("question")
+    if not question:
+        raise web.HTTPBadRequest(text="missing 'question'")
+    query_embedding = await aencode_text(question)
+    documents = await asearch_documents(query_embedding, payload.get("top_k", 10))
+
+    response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+    await response.prepare(request)
+    answer_cache = get_answer_cache()
+    answer = answer_cache.get(query_embedding, documents) if documents else None
+    if not documents:
+        await response.write("Sorry, no relevant documents found.".encode("utf-8"))
+    elif answer is not None:
+        await response.write(answer.encode("utf-8"))
+    else:
+        pieces = []
+        async for text in agenerate_answer(question, build_context(documents)):
+            await response.write(text.encode("utf-8"))
+            pieces.append(text)
+        answer_cache.put(question, query_embedding, "".join(pieces).strip(), documents)
+    await response.write_eof()
+    return response
+
+# GET /stats -> hit rates of the answer and embedding caches
+async def handle_stats(request):
+    return web.json_response({
+        "answer_cache": get_answer_cache().stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+    })
+
+def create_app():
+    async def http_session(app):
+        app["http_session"] = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE))
+        yield
+        await app["http_session"].close()
+
+    app = web.Application()
+    app.router.add_post("/ask", handle_ask)
+    app.router.add_get("/stats", handle_stats)
+    app.cleanup_ctx.append(http_session)
+    return app
+
+# Main function: `ingest` loads the sample documents, `ask` (the default) answers a question, `serve` runs the HTTP API
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Healthcare RAG question answering")
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("ingest", help="embed and upsert the sample healthcare documents (idempotent)")
+    ask_parser = subcommands.add_parser("ask", help="answer a healthcare question (default)")
+    ask_parser.add_argument("question", nargs="?", help="asked interactively if omitted")
+    serve_parser = subcommands.add_parser("serve", help="answer questions over HTTP, streaming (POST /ask)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        ingest_documents(healthcare_docs)
+        print(f"Ingested {len(healthcare_docs)} documents.")
+    elif args.command == "serve":
+        web.run_app(create_app(), host=args.host, port=args.port)
+    else:
+        ask(getattr(args, "question", None))
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,261 @@
+"""
+Vector stores behind one small interface, so retrieval can run against a remote Weaviate instance or
+an in-process index:
+
+    upsert(ids, vectors, payloads)  insert or overwrite objects by ID
+    search(vector, top_k)           payloads of the top_k most similar objects, best first
+    save()                          persist pending changes (no-op for remote stores)
+
+NumpyVectorStore keeps every vector L2-normalized in one contiguous float32 matrix, memory-mapped from
+disk once saved, and answers a query with a single matmul + argpartition (exact cosine similarity).
+FaissVectorStore puts an approximate HNSW or IVF index on top of the same storage for larger corpora.
+"""
+import os
+import json
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def normalize_rows(vectors):
+    """ float32 copy of `vectors` (one per row) scaled to unit length, so inner product == cosine """
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorStore:
+    def upsert(self, ids, vectors, payloads):
+        raise NotImplementedError
+
+    def search(self, vector, top_k=10):
+        raise NotImplementedError
+
+    def save(self):
+        pass
+
+
+class WeaviateVectorStore(VectorStore):
+    """ Objects live in a Weaviate class; every search is a `nearVector` query over the network """
+
+    def __init__(self, client_factory, class_name="Document", properties=("content", "source"),
+                 batch_size=100, timeout_retries=5):
+        self.client_factory = client_factory  # called on first use, so creating the store stays cheap
+        self.class_name = class_name
+        self.properties = list(properties)
+        self.batch_size = batch_size
+        self.timeout_retries = timeout_retries
+
+    @staticmethod
+    def _report_batch_errors(results):
+        for result in results or []:
+            errors = result.get("result", {}).get("errors")
+            if errors:
+                print(f"Weaviate batch insert failed: {errors}")
+
+    def upsert(self, ids, vectors, payloads):
+        client = self.client_factory()
+        client.batch.configure(
+            batch_size=self.batch_size,
+            timeout_retries=self.timeout_retries,
+            callback=self._report_batch_errors,
+        )
+        with client.batch as batch:
+            for object_id, vector, payload in zip(ids, vectors, payloads):
+                batch.add_data_object(data_object=payload, class_name=self.class_name, uuid=object_id,
+                                      vector=list(vector))
+
+    def search(self, vector, top_k=10):
+        result = self.client_factory().query.get(self.class_name, self.properties)\
+            .with_near_vector({"vector": list(vector)})\
+            .with_limit(top_k)\
+            .do()
+        return [{name: obj[name] for name in self.properties} for obj in result["data"]["Get"][self.class_name]]
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact search over an in-process matrix. With a `path` the store is a directory holding
+    `vectors.f32` (raw row-major float32, memory-mapped read-only on load) and `index.json`
+    (dimension, IDs and payloads in row order).
+    """
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path=None, dim=None):
+        self.path = path
+        self.dim = dim
+        self._ids = []
+        self._payloads = []
+        self._rows = {}  # ID -> row
+        self._buffer = None  # rows [0, len(self)) are live, the rest is spare capacity
+        self._dirty = False
+        if path and os.path.exists(os.path.join(path, self.INDEX_FILE)):
+            self._load()
+
+    def _load(self):
+        with open(os.path.join(self.path, self.INDEX_FILE), 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        self.dim, self._ids, self._payloads = index["dim"], index["ids"], index["payloads"]
+        self._rows = {object_id: row for row, object_id in enumerate(self._ids)}
+        if self._ids:
+            self._buffer = np.memmap(os.path.join(self.path, self.VECTORS_FILE), dtype=np.float32, mode='r',
+                                     shape=(len(self._ids), self.dim))
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def matrix(self):
+        """ The live (len(self), dim) float32 matrix of normalized vectors """
+        if self._buffer is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._buffer[:len(self._ids)]
+
+    def _reserve(self, rows):
+        """ Make room for `rows` live rows in a writable in-memory buffer, growing it geometrically """
+        capacity = 0 if self._buffer is None else len(self._buffer)
+        if rows <= capacity and not isinstance(self._buffer, np.memmap):
+            return
+        buffer = np.empty((max(rows, 2 * capacity, 1024), self.dim), dtype=np.float32)
+        buffer[:len(self._ids)] = self.matrix
+        self._buffer = buffer
+
+    def upsert(self, ids, vectors, payloads):
+        vectors = normalize_rows(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        new_ids = [object_id for object_id in dict.fromkeys(ids) if object_id not in self._rows]
+        self._reserve(len(self._ids) + len(new_ids))
+        for object_id in new_ids:
+            self._rows[object_id] = len(self._ids)
+            self._ids.append(object_id)
+            self._payloads.append(None)
+        rows = [self._rows[object_id] for object_id in ids]
+        self._buffer[rows] = vectors  # for an ID repeated in one call the last vector wins
+        for row, payload in zip(rows, payloads):
+            self._payloads[row] = payload
+        self._dirty = True
+
+    def search_rows(self, queries, top_k=10):
+        """ (scores, rows) of the top_k rows for each query, each of shape (len(queries), k), best first """
+        queries = normalize_rows(queries)
+        k = min(top_k, len(self))
+        scores = queries @ self.matrix.T
+        if k < len(self):
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(len(self)), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        return np.take_along_axis(candidate_scores, order, axis=1), np.take_along_axis(candidates, order, axis=1)
+
+    def search(self, vector, top_k=10):
+        if not len(self):
+            return []
+        _, rows = self.search_rows([vector], top_k)
+        return [self._payloads[row] for row in rows[0] if row >= 0]
+
+    def save(self):
+        """ Write both files atomically and switch back to a read-only memory map of the vectors """
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, self.VECTORS_FILE)
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        self.matrix.tofile(vectors_path + ".tmp")
+        with open(index_path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump({"dim": self.dim, "ids": self._ids, "payloads": self._payloads}, file, ensure_ascii=False)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(index_path + ".tmp", index_path)
+        self._dirty = False
+        self._load()
+
+
+class FaissVectorStore(NumpyVectorStore):
+    """
+    Approximate search with a FAISS index (inner product over the normalized vectors):
+    "hnsw" (graph, no training, best recall/latency) or "ivf" (k-means cells, `nprobe` of them scanned).
+    Vectors and payloads are stored exactly as in NumpyVectorStore; the index is rebuilt from them lazily
+    after an update, extended in place after pure inserts, and saved next to them as `faiss.index`.
+    """
+    FAISS_FILE = "faiss.index"
+
+    def __init__(self, path=None, dim=None, index_type="hnsw", hnsw_m=32, ef_search=64, nlist=None, nprobe=16):
+        if faiss is None:
+            raise ImportError("FaissVectorStore needs the faiss package: pip install faiss-cpu")
+        if index_type not in ("hnsw", "ivf"):
+            raise ValueError(f"unknown FAISS index type: {index_type}")
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._index = None
+        super().__init__(path, dim)
+
+    def _load(self):
+        super()._load()
+        index_path = os.path.join(self.path, self.FAISS_FILE)
+        if os.path.exists(index_path):
+            index = faiss.read_index(index_path)
+            if index.ntotal == len(self) and self.index_type == ("hnsw" if hasattr(index, "hnsw") else "ivf"):
+                self._index = self._configure(index)
+
+    def _configure(self, index):
+        if self.index_type == "hnsw":
+            index.hnsw.efSearch = self.ef_search
+        else:
+            index.nprobe = self.nprobe
+        return index
+
+    def build_index(self):
+        matrix = np.ascontiguousarray(self.matrix)
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        else:
+            # ~4 * sqrt(n) cells is the usual starting point; never more cells than training points
+            nlist = min(self.nlist or max(1, int(4 * len(self) ** 0.5)), len(self))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(self.dim), self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            # k-means needs a few dozen points per cell, not the whole corpus
+            sample = np.random.default_rng(0).choice(len(self), min(len(self), 64 * nlist), replace=False)
+            index.train(matrix[np.sort(sample)])
+        index.add(matrix)
+        self._index = self._configure(index)
+        return self._index
+
+    def upsert(self, ids, vectors, payloads):
+        inserts_only = len(set(ids)) == len(ids) and not any(object_id in self._rows for object_id in ids)
+        super().upsert(ids, vectors, payloads)
+        if self._index is not None and inserts_only:
+            self._index.add(np.ascontiguousarray(self.matrix[-len(ids):]))
+        else:
+            self._index = None  # overwritten rows: rebuild on the next search
+
+    def search_rows(self, queries, top_k=10):
+        index = self._index or self.build_index()
+        return index.search(normalize_rows(queries), min(top_k, len(self)))
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        index = self._index or (self.build_index() if len(self) else None)
+        super().save()
+        self._index = index  # reloading may have picked up the previous, now stale, index file
+        if index is not None:
+            faiss.write_index(index, os.path.join(self.path, self.FAISS_FILE))
+
+
+# Backends selectable by name (see VECTOR_STORE in healthcare_app_RAG.py)
+VECTOR_STORES = {
+    "weaviate": WeaviateVectorStore,
+    "numpy": NumpyVectorStore,
+    "faiss": FaissVectorStore,
+}
@@ -0,0 +1,170 @@
+"""
+End-to-end, per-stage latency of the repo's pipelines, offline, with a regression gate against a saved baseline.
+
+    python benchmark_pipelines.py                                   # every pipeline, one table per pipeline
+    python benchmark_pipelines.py --only meal_bot healthcare_rag --json report.json --folded report.folded
+    python benchmark_pipelines.py --save-baseline baseline.json     # on the machine that runs the gate
+    python benchmark_pipelines.py --baseline baseline.json --tolerance 0.25   # exit status 1 on a regression
+
+Every pipeline runs in a fresh Python process (so its imports, caches and peak RSS are its own), with
+deterministic fake embeddings and LLMs (fakes.py; RAG_02 uses its own fake_services) and its stages traced
+as spans (tracing.py, the pipelines themselves in scenarios.py). Reported per stage: count, p50/p95/p99/max
+latency, total time and items/s; per pipeline: wall time and peak RSS.
+
+--json writes all of it, with a latency histogram per stage; --folded writes folded stacks of the spans' own
+time (flamegraph.pl report.folded > report.svg, or open it in speedscope).
+
+A stage regresses when its p50 or p95 is more than --tolerance (a fraction) above the baseline's and at
+least --min-delta-ms slower; a pipeline when its peak RSS grows by more than --tolerance and 10 MB. Baselines
+are only comparable on the same machine and with the same options, so record one where the gate runs.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from scenarios import CHATBOT_DIR, SCENARIOS  # noqa: E402
+from tracing import Tracer, folded, peak_rss_mb, summarize  # noqa: E402
+
+GATED_METRICS = ("p50_ms", "p95_ms")
+MIN_RSS_DELTA_MB = 10.0
+
+
+def worker(name: str, config: dict) -> None:
+    """Runs in the child process: run one scenario traced and print its summary as JSON (last line)."""
+    tracer = Tracer().activate()
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        SCENARIOS[name](config, workdir)
+        wall_s = time.perf_counter() - start
+    tracer.deactivate()
+    print(json.dumps({"wall_s": wall_s, "peak_rss_mb": peak_rss_mb(), "stages": summarize(tracer.records),
+                      "folded": folded(tracer.records, root=name)}, ensure_ascii=False))
+
+
+def run_scenario(name: str, config: dict) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--config", json.dumps(config)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{name} failed (exit status {result.returncode}):\n{result.stderr[-4000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_scenario(name: str, result: dict) -> str:
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+    lines = [f"{name}: {result['wall_s']:.2f} s wall, peak RSS {rss}",
+             f"  {'stage':<28}{'n':>6}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}"
+             f"{'total (s)':>11}{'items/s':>12}"]
+    for stage, stats in result["stages"].items():
+        # items/s of a stage that ran once is just 1 / its latency
+        rate = f"{stats['items_per_s']:>12.0f}" if stats["items_per_s"] and stats["count"] > 1 else f"{'':>12}"
+        lines.append(f"  {stage:<28}{stats['count']:>6}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                     f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}{stats['total_s']:>11.3f}{rate}")
+    return "\n".join(lines)
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Regressions of `report` against `baseline`, one line each."""
+    regressions = []
+    for name, result in report["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if base_stats is None:
+                continue
+            for metric in GATED_METRICS:
+                now, before = stats[metric], base_stats[metric]
+                if now > before * (1 + tolerance) and now - before >= min_delta_ms:
+                    regressions.append(f"{name}/{stage} {metric[:-3]}: {before:.2f} -> {now:.2f} ms "
+                                       f"(+{(now / before - 1) * 100 if before else float('inf'):.0f}%)")
+        now, before = result["peak_rss_mb"], base["peak_rss_mb"]
+        if now is not None and before is not None and now > before * (1 + tolerance) \
+                and now - before >= MIN_RSS_DELTA_MB:
+            regressions.append(f"{name} peak RSS: {before:.0f} -> {now:.0f} MB (+{(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), help="pipelines to run (default: all)")
+    parser.add_argument("--json", help="write the full report (with histograms) to this file")
+    parser.add_argument("--folded", help="write folded stacks (flamegraph.pl / speedscope) to this file")
+    parser.add_argument("--baseline", help="report to compare with; exit status 1 on a regression")
+    parser.add_argument("--save-baseline", help="write this run's report as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    workload = parser.add_argument_group("workload")
+    workload.add_argument("--text-mb", type=float, default=8.0, help="TextProcessor input size")
+    workload.add_argument("--repeat", type=int, default=3, help="TextProcessor runs over the input")
+    workload.add_argument("--text-workers", type=int, default=2, help="processes of the TextProcessor parallel mode")
+    workload.add_argument("--meal-requests", type=int, default=400, help="meal bot requests (1/4 distinct)")
+    workload.add_argument("--documents", type=int, default=300, help="documents ingested by healthcare_rag")
+    workload.add_argument("--questions", type=int, default=50, help="questions per RAG pipeline")
+    workload.add_argument("--data-dir", default=os.path.join(CHATBOT_DIR, "data"), help="Personal_Chatbot PDFs")
+    workload.add_argument("--tokenizer", default="xmanii/maux-gte-persian",
+                          help="tokenizer for Personal_Chatbot chunking (name or path; from the HF cache offline)")
+    workload.add_argument("--dimension", type=int, default=768, help="fake embedding dimension (Personal_Chatbot)")
+    workload.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    workload.add_argument("--embed-latency", type=float, default=0.0, help="seconds per fake embedding call")
+    workload.add_argument("--service-latency", type=float, default=0.0, help="seconds per fake OpenAI request")
+    workload.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, json.loads(args.config))
+        return
+
+    config = {action.dest: getattr(args, action.dest) for action in workload._group_actions}
+    report = {
+        "meta": {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config},
+        "scenarios": {},
+    }
+    for name in args.only or SCENARIOS:
+        report["scenarios"][name] = run_scenario(name, config)
+        print(format_scenario(name, report["scenarios"][name]) + "\n")
+
+    folded_lines = [line for result in report["scenarios"].values() for line in result.pop("folded")]
+    if args.folded:
+        with open(args.folded, "w", encoding="utf-8") as f:
+            f.write("\n".join(folded_lines) + "\n")
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"]["config"] != config:
+            print("warning: the baseline was recorded with other workload options")
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        print(f"{len(regressions)} regressions against {args.baseline} (commit {baseline['meta']['commit']}, "
+              f"tolerance {args.tolerance:.0%}, min delta {args.min_delta_ms} ms)")
+        for regression in regressions:
+            print("  " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Deterministic stand-ins for the embedding model and the LLM, so the pipelines can be timed offline and two runs
+do the same work: the same text always gets the same vector and the same prompt the same answer.
+
+Both are LangChain components (Embeddings, LLM), used wherever the pipelines take a model: FAISS, retrievers,
+LCEL chains and LLMChain. `latency` adds a fixed sleep per call, to see how a pipeline behaves around a slow
+model; it is 0 by default, so only the pipeline's own work is measured.
+"""
+import time
+import random
+import hashlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+class FakeEmbeddings(Embeddings):
+    """Unit vectors seeded by a hash of the text; one `latency` sleep per embed call (a batch, as a model runs)."""
+
+    def __init__(self, dimension: int = 768, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.model_name = f"fake-embeddings-{dimension}"  # recorded by faiss_store like a real model name
+        self.normalize = True
+
+    def vector(self, text: str) -> np.ndarray:
+        vector = np.random.default_rng(_seed(text)).standard_normal(self.dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.vector(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeLLM(LLM):
+    """Answers with `tokens` words picked from the prompt, seeded by a hash of it; `latency` seconds per call."""
+
+    tokens: int = 50
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        words = prompt.split() or ["..."]
+        rng = random.Random(_seed(prompt))
+        return " ".join(rng.choice(words) for _ in range(self.tokens))
@@ -0,0 +1,269 @@
+"""
+One scenario per pipeline of the repo, each run end to end under span() with the fakes in place of the models.
+A scenario is `function(config, workdir)`: `config` holds the benchmark_pipelines.py options, `workdir` is an
+empty temporary directory for everything it writes (caches, indexes, outputs).
+
+  text_processor     CA_01 TextProcessor: load, normalize, tokenize, count, save (the in-memory path), then the
+                     same input through process_streaming(), process_parallel() and process_incremental()
+                     (first run, unchanged re-run, re-run after one file changed)
+  meal_bot           iranian_meal_bot_01: per request normalize, cache lookup, retrieve (local index),
+                     build-context (formatted answer) or generate (LLMChain over FakeLLM)
+  healthcare_rag     RAG_02 healthcare_app_RAG: ingest, then per question embed, retrieve, build-context,
+                     generate; OpenAI is fake_services.FakeServices, the vector store the NumPy one
+  personal_chatbot   CA_04 Personal_Chatbot: load PDFs, normalize, chunk, embed, index, load the index, then per
+                     question normalize, retrieve (MMR), build-context, generate (the notebook's chain)
+
+Each pipeline's modules are imported from its own directory, inside an "import" span: the cold start counts.
+"""
+import os
+import sys
+import json
+import glob
+import random
+
+from tracing import instrument, span
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXT_PROCESSOR_DIR = os.path.join(REPO_DIR, "CA_01_Python_review")
+MEAL_BOT_DIR = os.path.join(REPO_DIR, "iranian_meal_bot_01")
+HEALTHCARE_DIR = os.path.join(REPO_DIR, "RAG_02")
+CHATBOT_DIR = os.path.join(REPO_DIR, "CA_04_RAG_Chain_Personal_Chatbot")
+
+TEXT_CORPUS_FILES = 4  # files the TextProcessor input is split into for the incremental runs
+
+MEAL_OPTIONS = {"meal_time": ["lunch", "dinner"], "cuisine_type": ["any", "traditional", "fast-food"],
+                "heaviness": ["any", "heavy", "light"], "base": ["any", "rice", "bread", "other"]}
+UNKNOWN_INGREDIENTS = ["quinoa", "tofu", "kale", "avocado", "salmon"]  # not in the local index: LLM answers
+
+HEALTHCARE_TOPICS = ["diabetes", "hypertension", "asthma", "influenza", "arthritis", "stroke", "hepatitis",
+                     "obesity", "epilepsy", "pneumonia", "tuberculosis", "kidney disease"]
+
+# The Personal_Chatbot notebook's prompt
+CHATBOT_PROMPT = """
+شما یک دستیار هوشمند هستید که با استفاده از اطلاعات بازیابی‌شده از اسناد، به سوالات کاربر پاسخ می‌دهید.
+در صورت عدم وجود اطلاعات کافی، بگویید که پاسخ دقیقی در اسناد پیدا نشد.
+
+🧠 متن بازیابی‌شده:
+{context}
+
+❓ سوال کاربر:
+{question}
+
+✍️ پاسخ شما (به فارسی و روان):
+"""
+
+
+def _use_project(directory: str) -> None:
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+
+def text_processor(config: dict, workdir: str) -> None:
+    with span("import"):
+        _use_project(TEXT_PROCESSOR_DIR)
+        from text_processor import TextProcessor
+
+    # input.txt repeated up to --text-mb
+    with open(os.path.join(TEXT_PROCESSOR_DIR, "input.txt"), "r", encoding="utf-8") as f:
+        sample = f.read()
+    copies = max(1, int(config["text_mb"] * 2 ** 20 / len(sample.encode("utf-8"))))
+    input_path = os.path.join(workdir, "input.txt")
+    with open(input_path, "w", encoding="utf-8") as f:
+        f.write(sample * copies)
+    input_bytes = os.path.getsize(input_path)
+    output_path = os.path.join(workdir, "output.json")
+
+    processor = TextProcessor(input_path, output_path)
+    for _ in range(config["repeat"]):
+        with span("process"):
+            with span("load") as stage:
+                text = processor.read_file()
+                stage["items"] = len(text)
+            with span("normalize", items=len(text)):
+                text = processor.clean_text(text)
+            with span("tokenize") as stage:
+                words = processor.remove_stopwords(text.split())
+                stage["items"] = len(words)
+            with span("count", items=len(words)):
+                word_counts = processor.count_word_frequencies(words)
+            with span("save", items=len(word_counts)):
+                processor.save_results(word_counts)
+
+    # The same input through the streaming and the parallel engines (items: bytes of input)
+    streaming = TextProcessor(input_path, output_path, streaming=True)
+    parallel = TextProcessor(input_path, output_path, workers=config["text_workers"])
+    for _ in range(config["repeat"]):
+        with span("streaming", items=input_bytes):
+            streaming.process_streaming()
+        with span("parallel", items=input_bytes):
+            parallel.process_parallel()
+
+    # Incremental mode over the same text split into TEXT_CORPUS_FILES files: a first run with an empty state
+    # database, a re-run with nothing changed, and one after a file changed
+    corpus_dir = os.path.join(workdir, "corpus")
+    os.makedirs(corpus_dir)
+    parts = [sample * (copies // TEXT_CORPUS_FILES + (i < copies % TEXT_CORPUS_FILES))
+             for i in range(TEXT_CORPUS_FILES)]
+    for run in range(config["repeat"]):
+        for i, part in enumerate(parts):
+            with open(os.path.join(corpus_dir, f"part_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(part)
+        incremental = TextProcessor(corpus_dir, output_path, state_db=os.path.join(workdir, f"state_{run}.sqlite"))
+        with span("incremental"):
+            with span("first-run", items=input_bytes):
+                incremental.process_incremental()
+            with span("unchanged", items=TEXT_CORPUS_FILES):
+                incremental.process_incremental()
+            with open(os.path.join(corpus_dir, "part_0.txt"), "a", encoding="utf-8") as f:
+                f.write(f"\nویرایش شماره {run}\n")
+            with span("one-changed", items=len(parts[0].encode("utf-8"))):
+                incremental.process_incremental()
+
+
+def meal_requests(meals, count: int, distinct: int, seed: int):
+    """`count` requests drawn from `distinct` different ones; some name an ingredient the local index lacks."""
+    rng = random.Random(seed)
+    known = sorted({ingredient for meal in meals for ingredient in meal["ingredients"]})
+    pool = []
+    for _ in range(distinct):
+        ingredients = rng.sample(known, rng.randint(1, 3))
+        if rng.random() < 0.3:
+            ingredients.append(rng.choice(UNKNOWN_INGREDIENTS))
+        request = {key: rng.choice(values) for key, values in MEAL_OPTIONS.items()}
+        request["ingredients"] = ", ".join(ingredients)
+        request["include_recipe"] = rng.random() < 0.5
+        pool.append(request)
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def meal_bot(config: dict, workdir: str) -> None:
+    os.environ["RESPONSE_CACHE_PATH"] = os.path.join(workdir, "meal_response_cache.sqlite")
+    with span("import"):
+        _use_project(MEAL_BOT_DIR)
+        # A Streamlit script: imported outside `streamlit run`, its UI calls are no-ops (bare mode)
+        import streamlit_food_recommend_app as app
+    from fakes import FakeLLM
+
+    chain = app.LLMChain(llm=FakeLLM(latency=config["llm_latency"]), prompt=app.get_prompt())
+    cache = app.get_response_cache()
+    requests = meal_requests(app.IRANIAN_MEALS, config["meal_requests"], max(1, config["meal_requests"] // 4),
+                             config["seed"])
+    # The "Recommend meals" handler of the app, without the UI
+    for request in requests:
+        with span("request"):
+            with span("normalize"):
+                cache_key = app.response_cache_key(request["ingredients"], request["meal_time"],
+                                                   request["cuisine_type"], request["heaviness"], request["base"],
+                                                   request["include_recipe"])
+                ingredients = app.normalize_ingredients(request["ingredients"])
+            with span("cache-lookup"):
+                response = cache.get(cache_key)
+            if response is not None:
+                continue
+            with span("retrieve"):
+                recommendations = app.local_recommendations(ingredients, request["meal_time"],
+                                                            request["cuisine_type"], request["heaviness"],
+                                                            request["base"])
+            if recommendations:
+                with span("build-context"):
+                    app.format_recommendations(recommendations, request["include_recipe"])
+                continue
+            with span("generate"):
+                response = chain.run(**{**request, "include_recipe": str(request["include_recipe"])})
+            with span("cache-store"):
+                cache.put(cache_key, response)
+
+
+def healthcare_documents(docs, count: int):
+    """`docs` repeated (as distinct sources and texts) up to `count` documents."""
+    return [{"content": f"{doc['content']} (record {i})" if i >= len(docs) else doc["content"],
+             "source": f"{doc['source']} #{i}" if i >= len(docs) else doc["source"]}
+            for i, doc in ((i, docs[i % len(docs)]) for i in range(count))]
+
+
+def healthcare_rag(config: dict, workdir: str) -> None:
+    _use_project(HEALTHCARE_DIR)
+    from fake_services import FakeServices
+
+    with FakeServices(latency=config["service_latency"], token_delay=0.0) as services:
+        # Point the app at the fake server, a fresh embedding cache and a local vector store before import
+        os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embedding_cache.sqlite")
+        os.environ["VECTOR_STORE"] = "numpy"
+        os.environ["VECTOR_STORE_PATH"] = os.path.join(workdir, "vector_store")
+        os.environ["OPENAI_API_KEY"] = "fake-key"
+        os.environ["OPENAI_API_BASE"] = services.url + "/v1"
+        with span("import"):
+            import healthcare_app_RAG as app
+            app.get_encoding()
+        app.openai.api_base = services.url + "/v1"
+        instrument(app, embed_batch="embed-request", encode_text="embed", search_documents="retrieve",
+                   build_context="build-context", generate_answer="generate")
+
+        documents = healthcare_documents(app.healthcare_docs, config["documents"])
+        with span("ingest", items=len(documents)):
+            app.ingest_documents(documents)
+        for i in range(config["questions"]):
+            question = f"Question {i}: what are the symptoms of {HEALTHCARE_TOPICS[i % len(HEALTHCARE_TOPICS)]}?"
+            with span("ask"):
+                context = app.build_context(app.retrieve_documents(question))
+                app.generate_answer(question, context)
+
+
+def personal_chatbot(config: dict, workdir: str) -> None:
+    with span("import"):
+        _use_project(CHATBOT_DIR)
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+        from faiss_store import load_store, save_store
+        from pdf_loader import load_pdfs
+        from rag_index import make_text_splitter, normalize_docs, normalize_fa
+    from fakes import FakeEmbeddings, FakeLLM
+
+    with span("load-tokenizer"):
+        splitter = make_text_splitter(config["tokenizer"])
+    embeddings = FakeEmbeddings(config["dimension"], latency=config["embed_latency"])
+    pdf_paths = sorted(glob.glob(os.path.join(config["data_dir"], "*.pdf")))
+    index_dir = os.path.join(workdir, "index")
+
+    with span("load") as stage:
+        pages = load_pdfs(pdf_paths, os.path.join(workdir, "cached_extracted_data"))
+        stage["items"] = len(pages)
+    with span("normalize", items=len(pages)):
+        pages = normalize_docs(pages)
+    with span("chunk") as stage:
+        chunks = splitter.split_documents(pages)
+        stage["items"] = len(chunks)
+    texts = [chunk.page_content for chunk in chunks]
+    with span("embed", items=len(texts)):
+        vectors = embeddings.embed_documents(texts)
+    with span("index", items=len(texts)):
+        vectorstore = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings,
+                                            metadatas=[chunk.metadata for chunk in chunks])
+        save_store(vectorstore, index_dir)
+    with span("load-index"):
+        retriever = load_store(index_dir, embeddings).as_retriever(
+            search_type="mmr", search_kwargs={"k": 5, "fetch_k": 20, "lambda_mult": 0.5})
+
+    chain = ChatPromptTemplate.from_template(CHATBOT_PROMPT) | FakeLLM(latency=config["llm_latency"]) \
+        | StrOutputParser()
+    with open(os.path.join(CHATBOT_DIR, "eval_queries.jsonl"), "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+    for i in range(config["questions"]):
+        with span("ask"):
+            with span("normalize"):
+                question = normalize_fa(questions[i % len(questions)])
+            with span("retrieve"):
+                docs = retriever.invoke(question)
+            with span("build-context"):
+                context = "\n\n".join(doc.page_content for doc in docs)
+            with span("generate"):
+                chain.invoke({"context": context, "question": question})
+
+
+SCENARIOS = {
+    "text_processor": text_processor,
+    "meal_bot": meal_bot,
+    "healthcare_rag": healthcare_rag,
+    "personal_chatbot": personal_chatbot,
+}
@@ -0,0 +1,174 @@
+"""
+Stage tracing for the pipeline benchmarks: nested, timed spans, summarized per stage.
+
+    tracer = Tracer().activate()
+    with span("ask"):
+        with span("retrieve") as stage:
+            docs = retriever.invoke(question)
+            stage["items"] = len(docs)
+    instrument(app, build_context="build-context")   # every app.build_context(...) call becomes a span
+    summarize(tracer.records), folded(tracer.records, root="rag")
+
+span() and traced() report to the active Tracer and cost one global lookup when there is none, so they can
+stay in pipeline code. A span's path is the names of the spans open around it in the same thread (or task);
+work handed to a thread pool starts a new path at the top level.
+
+folded() writes one "root;ask;retrieve <microseconds>" line per path, the span's own time (without its
+children), which is the input flamegraph.pl and speedscope take.
+"""
+import sys
+import time
+import bisect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+_active = None  # the Tracer span() and traced() report to
+_open = contextvars.ContextVar("open_spans", default=())
+
+# Histogram bucket upper bounds in ms: 1-2-5 steps from 1 us to 100 s
+BUCKETS_MS = [mantissa * 10.0 ** exponent for exponent in range(-3, 6) for mantissa in (1, 2, 5)]
+
+
+class Tracer:
+    """Collects one record per finished span: {"path", "seconds", "self_s", "items"}."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.records: List[dict] = []
+        self._lock = threading.Lock()
+
+    def activate(self) -> "Tracer":
+        global _active
+        _active = self
+        return self
+
+    def deactivate(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+
+    @contextmanager
+    def span(self, name: str, items: int = 1):
+        """Time the block as stage `name`; set the yielded dict's "items" to what the block processed."""
+        parents = _open.get()
+        frame = {"name": name, "items": items, "children_s": 0.0}
+        token = _open.set(parents + (frame,))
+        start = self.clock()
+        try:
+            yield frame
+        finally:
+            seconds = self.clock() - start
+            _open.reset(token)
+            record = {"path": tuple(parent["name"] for parent in parents) + (name,), "seconds": seconds,
+                      "self_s": seconds - frame["children_s"], "items": frame["items"]}
+            with self._lock:
+                if parents:
+                    parents[-1]["children_s"] += seconds
+                self.records.append(record)
+
+
+@contextmanager
+def _no_span():
+    yield {}
+
+
+def span(name: str, items: int = 1):
+    """Tracer.span of the active tracer; does nothing without one."""
+    tracer = _active
+    if tracer is None:
+        return _no_span()
+    return tracer.span(name, items)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: every call is a span named `name` (the function's name by default)."""
+
+    def decorate(function):
+        stage = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _active
+            if tracer is None:
+                return function(*args, **kwargs)
+            with tracer.span(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def instrument(module, **stages: str):
+    """Replace module.<function> by a traced() wrapper for each function=stage given; returns an undo function."""
+    originals = {attribute: getattr(module, attribute) for attribute in stages}
+    for attribute, stage in stages.items():
+        setattr(module, attribute, traced(stage)(originals[attribute]))
+
+    def undo():
+        for attribute, function in originals.items():
+            setattr(module, attribute, function)
+
+    return undo
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def histogram(values_ms: List[float]) -> List[list]:
+    """[[bucket upper bound (ms), count], ...] for the non-empty BUCKETS_MS buckets ("inf" past the last)."""
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for value in values_ms:
+        counts[bisect.bisect_left(BUCKETS_MS, value)] += 1
+    bounds = BUCKETS_MS + ["inf"]
+    return [[bounds[i], count] for i, count in enumerate(counts) if count]
+
+
+def summarize(records: List[dict]) -> Dict[str, dict]:
+    """Per stage path ("ask/retrieve"): count, latency percentiles and histogram (ms), totals and items/s."""
+    by_path = {}
+    for record in records:
+        by_path.setdefault(record["path"], []).append(record)
+    stages = {}
+    for path, group in sorted(by_path.items()):
+        values = sorted(record["seconds"] * 1000 for record in group)
+        total_s = sum(record["seconds"] for record in group)
+        items = sum(record["items"] for record in group)
+        stages["/".join(path)] = {
+            "count": len(group),
+            "items": items,
+            "total_s": total_s,
+            "self_s": sum(record["self_s"] for record in group),
+            "mean_ms": total_s * 1000 / len(group),
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+            "max_ms": values[-1],
+            "items_per_s": items / total_s if total_s > 0 else None,
+            "histogram_ms": histogram(values),
+        }
+    return stages
+
+
+def folded(records: List[dict], root: str) -> List[str]:
+    """Folded stacks: "root;stage;substage <self time in us>" per path, summed over its spans."""
+    totals = {}
+    for record in records:
+        stack = ";".join((root,) + record["path"])
+        totals[stack] = totals.get(stack, 0.0) + record["self_s"]
+    return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(totals.items()) if seconds > 0]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far (None where the resource module is missing)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
@@ -22,7 +22,12 @@ Notes:
 """
 
 import os
+import json
+import time
 import random
+import sqlite3
+import threading
+from collections import defaultdict
 import streamlit as st
 from typing import Dict, Any, List
 
@@ -36,6 +41,10 @@ load_dotenv()
 # We'll choose the wrapper depending on PROVIDER
 PROVIDER = os.environ.get("PROVIDER", "huggingface")  # "huggingface" or "openai_compatible"
 
+# LLM answers are cached on disk, keyed on the normalized inputs
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "meal_response_cache.sqlite")
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 7 * 24 * 3600))  # seconds
+
 # Try to import LLM classes lazily so the app can show an error if missing
 try:
     if PROVIDER == "huggingface":
@@ -52,17 +61,86 @@ except Exception as e:
 # ---------------------------
 
 IRANIAN_MEALS = [
-    # A small list of traditional iranian meals to pick randomly from when inputs are sparse
-    {"name": "Ghormeh Sabzi", "type": "traditional", "base": "rice"},
-    {"name": "Chelo Kebab", "type": "traditional", "base": "rice"},
-    {"name": "Gheymeh", "type": "traditional", "base": "rice"},
-    {"name": "Fesenjan", "type": "traditional", "base": "rice"},
-    {"name": "Tahcheen", "type": "traditional", "base": "rice"},
-    {"name": "Mirza Ghasemi", "type": "traditional", "base": "bread"},
-    {"name": "Kookoo Sabzi", "type": "traditional", "base": "bread"},
-    {"name": "Adas Polo", "type": "traditional", "base": "rice"},
-    {"name": "Kashk-e Bademjan", "type": "traditional", "base": "bread"},
-    {"name": "Zereshk Polo", "type": "traditional", "base": "rice"},
+    # Iranian meals with the tags the local recommender ranks on (meal_time: the meals it is eaten at);
+    # also the pool for the random fallback
+    {"name": "Ghormeh Sabzi", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["herbs", "kidney beans", "lamb", "dried lime", "onion"],
+     "recipe": ["Fry chopped herbs and onion", "Simmer with lamb, beans and dried lime", "Serve over steamed rice"]},
+    {"name": "Chelo Kebab", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["ground beef", "lamb", "onion", "saffron", "tomato", "rice"],
+     "recipe": ["Knead minced meat with grated onion", "Skewer and grill with tomatoes", "Serve with saffron rice"]},
+    {"name": "Gheymeh", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["split peas", "lamb", "tomato paste", "dried lime", "potato", "onion"],
+     "recipe": ["Brown lamb and onion with tomato paste", "Simmer with split peas and dried lime", "Top with fried potato sticks"]},
+    {"name": "Fesenjan", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["walnut", "pomegranate molasses", "chicken", "onion"],
+     "recipe": ["Toast and grind the walnuts", "Simmer with pomegranate molasses for hours", "Add chicken and cook until tender"]},
+    {"name": "Tahcheen", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch"],
+     "ingredients": ["rice", "yogurt", "saffron", "chicken", "egg"],
+     "recipe": ["Mix parboiled rice with yogurt, egg, saffron", "Layer with cooked chicken in a pan", "Bake until the crust turns golden"]},
+    {"name": "Mirza Ghasemi", "type": "traditional", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["eggplant", "tomato", "garlic", "egg"],
+     "recipe": ["Roast and mash the eggplants", "Fry with garlic and tomato", "Stir in eggs, serve with bread"]},
+    {"name": "Kookoo Sabzi", "type": "traditional", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["herbs", "egg", "walnut", "barberry"],
+     "recipe": ["Beat eggs with chopped herbs", "Fold in walnuts and barberries", "Fry both sides until set"]},
+    {"name": "Adas Polo", "type": "traditional", "base": "rice", "heaviness": "light", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["rice", "lentils", "raisins", "dates", "onion"],
+     "recipe": ["Cook lentils until just tender", "Steam together with parboiled rice", "Top with fried onion, raisins, dates"]},
+    {"name": "Kashk-e Bademjan", "type": "traditional", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["eggplant", "kashk", "mint", "onion", "garlic", "walnut"],
+     "recipe": ["Fry and mash the eggplants", "Mix in kashk and fried garlic", "Garnish with mint oil and walnuts"]},
+    {"name": "Zereshk Polo", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["rice", "barberry", "saffron", "chicken"],
+     "recipe": ["Braise chicken with onion and saffron", "Saute barberries with a little sugar", "Scatter over saffron rice"]},
+    {"name": "Abgoosht", "type": "traditional", "base": "bread", "heaviness": "heavy", "meal_time": ["lunch"],
+     "ingredients": ["lamb", "chickpeas", "white beans", "potato", "tomato", "dried lime"],
+     "recipe": ["Simmer lamb with chickpeas and beans", "Add potato, tomato and dried lime", "Serve the broth with bread, mash the rest"]},
+    {"name": "Baghali Polo", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["rice", "fava beans", "dill", "lamb"],
+     "recipe": ["Cook lamb shanks until tender", "Steam rice with fava beans and dill", "Serve the lamb on top"]},
+    {"name": "Loobia Polo", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["rice", "green beans", "ground beef", "tomato paste"],
+     "recipe": ["Fry beef with onion and tomato paste", "Add chopped green beans", "Layer with rice and steam"]},
+    {"name": "Joojeh Kabab", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["chicken", "saffron", "lemon", "onion", "rice"],
+     "recipe": ["Marinate chicken in lemon, onion, saffron", "Skewer and grill over high heat", "Serve with rice and grilled tomato"]},
+    {"name": "Khoresh Bademjan", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["eggplant", "lamb", "tomato", "split peas", "onion"],
+     "recipe": ["Fry eggplant slices until golden", "Simmer lamb with tomato and split peas", "Lay eggplant on top and finish cooking"]},
+    {"name": "Sabzi Polo ba Mahi", "type": "traditional", "base": "rice", "heaviness": "heavy", "meal_time": ["dinner"],
+     "ingredients": ["rice", "herbs", "fish", "garlic"],
+     "recipe": ["Steam rice with chopped herbs and garlic", "Pan-fry the fish fillets", "Serve fish beside the herbed rice"]},
+    {"name": "Ash Reshteh", "type": "traditional", "base": "other", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["noodles", "herbs", "kidney beans", "chickpeas", "lentils", "kashk"],
+     "recipe": ["Simmer beans and lentils until soft", "Add herbs, then noodles", "Top with kashk and fried mint"]},
+    {"name": "Dolmeh", "type": "traditional", "base": "other", "heaviness": "light", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["grape leaves", "rice", "ground beef", "split peas", "herbs"],
+     "recipe": ["Mix rice, meat, split peas and herbs", "Roll the filling in grape leaves", "Simmer in a sweet-sour sauce"]},
+    {"name": "Kotlet", "type": "traditional", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["ground beef", "potato", "egg", "onion"],
+     "recipe": ["Mix grated potato, meat, egg, onion", "Shape into flat patties", "Fry both sides, serve with bread"]},
+    {"name": "Kuku Sibzamini", "type": "traditional", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["potato", "egg", "onion"],
+     "recipe": ["Grate boiled potatoes and onion", "Bind with beaten eggs and turmeric", "Fry as small patties"]},
+    {"name": "Olivieh", "type": "fast-food", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["chicken", "potato", "egg", "pickles", "mayonnaise", "peas"],
+     "recipe": ["Boil and dice potato, egg, chicken", "Mix with pickles, peas, mayonnaise", "Chill, then serve in bread"]},
+    {"name": "Kalbas Sandwich", "type": "fast-food", "base": "bread", "heaviness": "light", "meal_time": ["dinner"],
+     "ingredients": ["mortadella", "tomato", "pickles", "lettuce"],
+     "recipe": ["Slice the mortadella thinly", "Fill a baguette with tomato and pickles", "Add lettuce and sauce"]},
+    {"name": "Sosis Bandari", "type": "fast-food", "base": "bread", "heaviness": "heavy", "meal_time": ["dinner"],
+     "ingredients": ["sausage", "onion", "tomato paste", "potato", "chili"],
+     "recipe": ["Fry onion and sliced sausage", "Add tomato paste, chili and potato", "Serve hot in bread"]},
+    {"name": "Falafel", "type": "fast-food", "base": "bread", "heaviness": "light", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["chickpeas", "herbs", "garlic", "onion"],
+     "recipe": ["Grind soaked chickpeas with herbs, garlic", "Shape and deep-fry until crisp", "Serve in bread with pickles"]},
+    {"name": "Iranian Hamburger", "type": "fast-food", "base": "bread", "heaviness": "heavy", "meal_time": ["lunch", "dinner"],
+     "ingredients": ["ground beef", "onion", "tomato", "pickles"],
+     "recipe": ["Mix beef with grated onion", "Press into thin patties and fry", "Serve in buns with tomato and pickles"]},
+    {"name": "Iranian Pizza", "type": "fast-food", "base": "other", "heaviness": "heavy", "meal_time": ["dinner"],
+     "ingredients": ["sausage", "cheese", "mushroom", "bell pepper"],
+     "recipe": ["Top dough with sausage, mushroom, pepper", "Cover generously with cheese", "Bake in a hot oven"]},
 ]
 
 # A simple heuristic to measure "amount of info" supplied by user
@@ -82,6 +160,94 @@ def info_score(ingredients: str, meal_time: str, cuisine_type: str, heaviness: s
         score += 1
     return score
 
+# ---------------------------
+# Local recommendations & response cache (answer without the LLM when possible)
+# ---------------------------
+
+def normalize_ingredients(ingredients: str) -> List[str]:
+    """ Lower-cased, de-duplicated and sorted, so "Rice, saffron" and "saffron,rice" are the same request """
+    return sorted({t.strip().lower() for t in (ingredients or "").split(",") if t.strip()})
+
+def response_cache_key(ingredients: str, meal_time: str, cuisine_type: str, heaviness: str, base: str, include_recipe: bool) -> str:
+    return json.dumps([normalize_ingredients(ingredients), meal_time, cuisine_type, heaviness, base, bool(include_recipe)])
+
+@st.cache_resource(show_spinner=False)
+def get_ingredient_index() -> Dict[str, List[int]]:
+    """ Inverted index: ingredient -> positions of the meals in IRANIAN_MEALS that use it """
+    index = defaultdict(list)
+    for position, meal in enumerate(IRANIAN_MEALS):
+        for ingredient in meal["ingredients"]:
+            index[ingredient].append(position)
+    return dict(index)
+
+def lookup_ingredient(index: Dict[str, List[int]], ingredient: str):
+    # also try the singular of simple plurals ("eggs", "tomatoes")
+    for candidate in (ingredient, ingredient.removesuffix("s"), ingredient.removesuffix("es")):
+        if candidate in index:
+            return index[candidate]
+    return None
+
+def local_recommendations(ingredients: List[str], meal_time: str, cuisine_type: str, heaviness: str, base: str, limit: int = 3):
+    """
+    Rank IRANIAN_MEALS by how many of the (normalized) ingredients they use, keeping only meals matching
+    the selected meal time, cuisine type, heaviness and base. Returns a list of (meal, matched ingredients), or None
+    when an ingredient is unknown to the index or no meal fits: a novel combination, left to the LLM.
+    """
+    index = get_ingredient_index()
+    matched = defaultdict(list)  # meal position -> the user's ingredients it uses
+    for ingredient in ingredients:
+        positions = lookup_ingredient(index, ingredient)
+        if positions is None:
+            return None
+        for position in positions:
+            matched[position].append(ingredient)
+
+    filters = {"type": cuisine_type, "heaviness": heaviness, "base": base}
+    candidates = [
+        position for position, meal in enumerate(IRANIAN_MEALS)
+        if all(value == "any" or meal[key] == value for key, value in filters.items())
+        and (meal_time == "any" or meal_time in meal["meal_time"])
+        and (matched[position] or not ingredients)
+    ]
+    candidates.sort(key=lambda position: -len(matched[position]))  # stable: ties keep IRANIAN_MEALS order
+    return [(IRANIAN_MEALS[position], matched[position]) for position in candidates[:limit]] or None
+
+def format_recommendations(recommendations, include_recipe: bool) -> str:
+    """ The same layout the prompt asks the LLM for """
+    lines = []
+    for number, (meal, used) in enumerate(recommendations, start=1):
+        lines.append(f"{number}) {meal['name']} — ({meal['base']}, {meal['heaviness']}, {meal['type']})")
+        lines.append(f"   - Why: Uses your {', '.join(used)}." if used else "   - Why: Fits your preferences.")
+        if include_recipe:
+            lines.append("   - Recipe: " + " ".join(f"{step_number}) {step}." for step_number, step in enumerate(meal["recipe"], start=1)))
+    return "\n".join(lines)
+
+class ResponseCache:
+    """ Persistent key -> response store (SQLite); entries older than `ttl` seconds count as missing """
+
+    def __init__(self, path: str, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()  # one connection shared by all sessions' script threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, created REAL)")
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - ttl,))
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return row[0]
+
+    def put(self, key: str, response: str):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)", (key, response, time.time()))
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    return ResponseCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL)
+
 # ---------------------------
 # LLM Initialization
 # ---------------------------
@@ -176,7 +342,21 @@ Output:
    - Recipe: 1) Fry eggplant. 2) Add yogurt. 3) Serve with mint & bread.
 """
 
-prompt = PromptTemplate(input_variables=["ingredients","meal_time","cuisine_type","heaviness","base","include_recipe"], template=PROMPT_TEXT)
+# ---------------------------
+# Shared resources (built once per process, reused by every session and rerun)
+# ---------------------------
+
+@st.cache_resource(show_spinner=False)
+def get_prompt():
+    return PromptTemplate(input_variables=["ingredients","meal_time","cuisine_type","heaviness","base","include_recipe"], template=PROMPT_TEXT)
+
+@st.cache_resource(show_spinner="Connecting to the LLM...")
+def get_chain():
+    """
+    One LLM client (and its HTTP connection pool) and one chain for the whole process.
+    The chain is stateless: conversation memory is per session, in st.session_state.
+    """
+    return LLMChain(llm=init_llm(), prompt=get_prompt(), verbose=False)
 
 # ---------------------------
 # Streamlit UI
@@ -214,6 +394,8 @@ generate_btn = st.button("Recommend meals")
 # Conversation memory in session state
 if "history" not in st.session_state:
     st.session_state.history = []
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationBufferMemory()
 
 if generate_btn:
     # compute info score
@@ -233,26 +415,54 @@ if generate_btn:
 
     # If fallback: pick one random traditional meal and craft a short deterministic message to LLM
     if fallback:
-        chosen = random.choice(IRANIAN_MEALS)
+        chosen = random.choice([meal for meal in IRANIAN_MEALS if meal["type"] == "traditional"])
         # Create a small deterministic reply ourselves for immediate response, and also call LLM to get richer text if wanted.
         fallback_text = f"FALLBACK RECOMMENDATION:\n1) {chosen['name']} — ({chosen['base']}, traditional)\n   - Why: Classic, widely-liked, uses common pantry ingredients.\n   - Recipe: 1) Prepare ingredients. 2) Cook slowly. 3) Serve with rice or bread.\n\n(You provided very little info; showing a random Iranian traditional meal.)"
         # Store and show
         st.session_state.history.append({"role":"assistant","content":fallback_text})
         st.experimental_rerun()
 
-    # If not fallback, call LLM
-    try:
-        with st.spinner("Contacting the LLM..."):
-            llm = init_llm()
-            chain = LLMChain(llm=llm, prompt=prompt, verbose=False, memory=ConversationBufferMemory())  # simple chain
-            raw_response = chain.run(**prompt_inputs)
-    except Exception as e:
-        st.error(f"LLM initialization or call failed: {e}")
-        st.stop()
+    # If not fallback: cached answer, else the local index, else call LLM (timing each stage)
+    timings = {}
+    start = time.perf_counter()
+    cache_key = response_cache_key(ingredients, meal_time, cuisine_type, heaviness, base, include_recipe)
+    raw_response = get_response_cache().get(cache_key)
+    timings["cache lookup"] = time.perf_counter() - start
+    answered_by = "cache"
+
+    if raw_response is None:
+        start = time.perf_counter()
+        recommendations = local_recommendations(normalize_ingredients(ingredients), meal_time, cuisine_type, heaviness, base,
+                                                limit=num_results)
+        timings["local index"] = time.perf_counter() - start
+        if recommendations:
+            raw_response = format_recommendations(recommendations, include_recipe)
+            answered_by = "local index"
+
+    if raw_response is None:
+        answered_by = "LLM"
+        try:
+            start = time.perf_counter()
+            chain = get_chain()  # only the first request of the process pays for building it
+            timings["get chain"] = time.perf_counter() - start
+            with st.spinner("Contacting the LLM..."):
+                start = time.perf_counter()
+                raw_response = chain.run(**prompt_inputs)
+                timings["LLM call"] = time.perf_counter() - start
+        except Exception as e:
+            st.error(f"LLM initialization or call failed: {e}")
+            st.stop()
+        get_response_cache().put(cache_key, raw_response)
 
     # Save conversation
-    st.session_state.history.append({"role":"user","content":f"Ingredients: {ingredients} | meal_time: {meal_time} | cuisine_type: {cuisine_type} | heaviness: {heaviness} | base: {base}"})
+    start = time.perf_counter()
+    user_text = f"Ingredients: {ingredients} | meal_time: {meal_time} | cuisine_type: {cuisine_type} | heaviness: {heaviness} | base: {base}"
+    st.session_state.memory.save_context({"input": user_text}, {"output": raw_response})
+    st.session_state.history.append({"role":"user","content":user_text})
     st.session_state.history.append({"role":"assistant","content":raw_response})
+    timings["save memory"] = time.perf_counter() - start
+    st.session_state.timings = timings
+    st.session_state.answered_by = answered_by
 
 # Display history (latest first)
 if st.session_state.history:
@@ -263,6 +473,10 @@ if st.session_state.history:
         else:
             st.markdown(f"**Bot:**\n{msg['content']}")
 
+# Stage timings of the last request
+if st.session_state.get("timings"):
+    st.caption(f"Last request (answered by {st.session_state.answered_by}): " + " | ".join(f"{stage}: {seconds * 1000:.1f} ms" for stage, seconds in st.session_state.timings.items()))
+
 # Footer: quick local test helper
 st.markdown("---")
 st.markdown("**Quick local test suggestions:**")